@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'core',
@@ -90,6 +91,53 @@ DATABASES = {
 }
 
 
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+# JSON is encoded with orjson when it is installed
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+
+# LocMemCache is private to each process, which suits tests and a single
+# runserver process only: a change invalidates the recipe lists cached
+# by the process that made it, while other workers keep serving stale
+# lists until they expire. Deployments running several processes must
+# set CACHE_BACKEND and CACHE_LOCATION to a shared cache such as
+# memcached, or django.core.cache.backends.db.DatabaseCache after
+# running createcachetable.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# Cache alias and timeout (seconds) for recipe list responses
+RECIPE_CACHE_ALIAS = 'default'
+RECIPE_CACHE_TIMEOUT = 60 * 10
+
+# Size and TTL (seconds) of the in-process token to user cache
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_CACHE_TTL = 60
+
+# Issue short lived signed access tokens alongside DB tokens. Reads with
+# an access token are not checked against the database, so a deactivated
+# or deleted user keeps read access until the token expires
+SIGNED_ACCESS_TOKENS = bool(int(os.environ.get('SIGNED_ACCESS_TOKENS', 0)))
+ACCESS_TOKEN_TTL = 60 * 5
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -132,5 +180,43 @@ MEDIA_URL = '/media/'
 STATIC_ROOT = '/vol/web/static'
 MEDIA_ROOT = '/vol/web/media'
 
+# Store identical recipe images once under content hash paths
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+
+# How authorized media is sent: 'django' streams a FileResponse,
+# 'x-accel' hands off to nginx at MEDIA_ACCEL_PREFIX (an internal
+# location aliased to MEDIA_ROOT) and 'x-sendfile' to Apache/lighttpd
+MEDIA_SERVE_MODE = os.environ.get('MEDIA_SERVE_MODE', 'django')
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Worker threads and encoder quality for recipe image renditions
+IMAGE_PROCESSING_WORKERS = 2
+IMAGE_RENDITION_QUALITY = 80
+
+# Uploads above IMAGE_MAX_PIXELS are rejected before decoding, larger
+# sides than IMAGE_MAX_DIMENSION are downscaled when stored. JPEGs are
+# decoded at a reduced scale, so the larger cap only costs memory near
+# the size of the downscaled image. PNG, GIF and WebP have no reduced
+# decoding and take about 4 bytes per pixel, so they are capped at
+# IMAGE_MAX_FULL_DECODE_PIXELS instead (24 MP is roughly 100 MB).
+IMAGE_MAX_PIXELS = 100 * 1000 * 1000
+IMAGE_MAX_FULL_DECODE_PIXELS = 24 * 1000 * 1000
+IMAGE_MAX_DIMENSION = 3000
+IMAGE_INGEST_QUALITY = 90
+
+# Largest recipe image accepted through chunked uploads, in bytes
+IMAGE_UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+
+# Chunked uploads not finalized within this many seconds are removed by
+# gc_recipe_images
+IMAGE_UPLOAD_EXPIRY = 60 * 60 * 24
+
+# Replaced images modified less than this many seconds ago are left to
+# gc_recipe_images, as an identical upload may be reusing the file
+IMAGE_RELEASE_MIN_AGE = 60 * 5
+
+# Recipes read and serialized per batch by the recipe export
+RECIPE_EXPORT_CHUNK_SIZE = 2000
+
 # Override default django user model with core user model
 AUTH_USER_MODEL = 'core.User'
@@ -0,0 +1,153 @@
+import math
+import multiprocessing
+import random
+import resource
+import statistics
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.db import connection, transaction
+
+from core.models import Recipe
+
+
+SYLLABLES = (
+    "ba", "ca", "chi", "do", "fen", "ga", "ka", "la", "li", "mo", "na",
+    "pe", "po", "ra", "ri", "sa", "so", "ta", "to", "va", "ve", "zu",
+)
+
+
+def timings(func, repeat=5):
+    """Return the seconds taken by each of repeat calls to func"""
+    results = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        results.append(time.perf_counter() - started)
+
+    return results
+
+
+def measure(func, repeat=5):
+    """Return the median seconds taken by calling func repeat times"""
+    return statistics.median(timings(func, repeat))
+
+
+def percentile(values, percent):
+    """Return the nearest rank percentile of a list of values"""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(len(ordered) * percent / 100) - 1, 0)]
+
+
+def random_names(count, seed=0):
+    """Return count distinct made up names of two words"""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        names.add(" ".join(
+            "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+            for _ in range(2)
+        ))
+
+    return sorted(names)
+
+
+def _rss_growth(func, args):
+    """Call func and return how far it raised the peak RSS, in bytes"""
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    func(*args)
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux
+    return (after - before) * 1024
+
+
+def peak_rss_growth(func, *args):
+    """Return the peak RSS growth of func(*args), in bytes
+
+    The call runs in a forked process, so every measurement starts from
+    the same memory and is not hidden by an earlier, higher peak.
+    """
+    with multiprocessing.get_context("fork").Pool(1) as pool:
+        return pool.apply(_rss_growth, (func, args))
+
+
+def peak_traced_memory(func, *args):
+    """Return the peak Python memory allocated by func(*args), in bytes
+
+    Unlike peak_rss_growth this runs in the current process, so func
+    can use the open transaction. Memory allocated outside the Python
+    allocator, such as by database drivers, is not counted.
+    """
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def megabytes(size):
+    """Format a size in bytes as megabytes"""
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+@contextmanager
+def rolled_back():
+    """Run a block in a transaction that is always rolled back
+
+    Benchmarks create their data inside it, so they can run against any
+    database without leaving rows behind.
+    """
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def bench_user():
+    """Create a throwaway user to own benchmark data"""
+    return get_user_model().objects.create_user(
+        f"bench-{uuid.uuid4().hex}@example.com",
+        uuid.uuid4().hex
+    )
+
+
+def analyze(*models):
+    """Prepare the tables of freshly loaded data for the planner
+
+    Rows inserted into a GIN index wait in its pending list until a
+    vacuum, which cannot run in a transaction and makes the planner
+    shun the index, so pending lists are flushed before the ANALYZE.
+    """
+    with connection.cursor() as cursor:
+        for model in models:
+            for index in model._meta.indexes:
+                if isinstance(index, GinIndex):
+                    cursor.execute(
+                        "SELECT gin_clean_pending_list(%s::regclass)",
+                        [index.name]
+                    )
+            cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+
+def link_recipes(name, recipes, related, start, stop):
+    """Link each recipe to related objects start to stop, in rotation"""
+    field = Recipe._meta.get_field(name)
+    through = field.remote_field.through
+    source = field.m2m_field_name() + "_id"
+    target = field.m2m_reverse_field_name() + "_id"
+    through.objects.bulk_create(
+        (
+            through(**{
+                source: recipe.pk,
+                target: related[(index + offset) % len(related)].pk
+            })
+            for index, recipe in enumerate(recipes)
+            for offset in range(start, stop)
+        ),
+        batch_size=5000,
+        ignore_conflicts=True
+    )
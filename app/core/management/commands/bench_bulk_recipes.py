@@ -0,0 +1,83 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.benchmarks import bench_user, rolled_back
+from core.models import Ingredient, Tag
+from recipe.views import RecipeViewSet
+
+
+class Command(BaseCommand):
+    """Django command to compare bulk recipe writes with single POSTs
+
+    The same recipes are created once through the bulk endpoint and
+    once with a POST each, calling the views directly. All data is
+    rolled back afterwards.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=1000)
+        parser.add_argument(
+            "--links",
+            type=int,
+            default=3,
+            help="Tags and ingredients per recipe"
+        )
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = bench_user()
+            tags = Tag.objects.bulk_create(
+                Tag(user=user, name=f"Tag {i}") for i in range(20)
+            )
+            ingredients = Ingredient.objects.bulk_create(
+                Ingredient(user=user, name=f"Ingredient {i}")
+                for i in range(20)
+            )
+            payload = [
+                {
+                    "title": f"Recipe {i}",
+                    "time_minutes": 10,
+                    "price": "5.00",
+                    "tags": [
+                        tags[(i + offset) % len(tags)].pk
+                        for offset in range(options["links"])
+                    ],
+                    "ingredients": [
+                        ingredients[(i + offset) % len(ingredients)].pk
+                        for offset in range(options["links"])
+                    ],
+                }
+                for i in range(options["recipes"])
+            ]
+
+            single = RecipeViewSet.as_view({"post": "create"})
+            self._report("Single POSTs", user, [
+                (single, item) for item in payload
+            ])
+            bulk = RecipeViewSet.as_view({"post": "bulk"})
+            self._report("Bulk endpoint", user, [(bulk, payload)])
+
+    def _report(self, label, user, calls):
+        factory = APIRequestFactory()
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            started = time.perf_counter()
+            for view, data in calls:
+                request = factory.post("/", data, format="json")
+                force_authenticate(request, user)
+                response = view(request)
+                if response.status_code != 201:
+                    raise CommandError(f"{label} failed: {response.data}")
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{label}: {elapsed * 1000:.0f} ms, {len(queries)} queries"
+        )
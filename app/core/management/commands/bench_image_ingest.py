@@ -0,0 +1,58 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from core.benchmarks import measure, megabytes, peak_rss_growth
+from recipe.images import downscale_image
+
+
+def full_decode(path):
+    """Ingest an image the way ImageField did: decode it, then resize"""
+    max_side = settings.IMAGE_MAX_DIMENSION
+    with Image.open(path) as image:
+        image.load()
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+
+def draft_downscale(path):
+    """Ingest an image through downscale_image"""
+    with open(path, "rb") as image_file:
+        downscale_image(image_file)
+
+
+class Command(BaseCommand):
+    """Django command to compare the peak memory of image ingest paths
+
+    A JPEG of the given size is ingested by fully decoding it, as before
+    downscale_image existed, and by downscale_image. Each run happens in
+    a fresh process so its peak RSS is measured on its own.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--width", type=int, default=8000)
+        parser.add_argument("--height", type=int, default=6000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        size = (options["width"], options["height"])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "photo.jpg")
+            Image.new("RGB", size, "orange").save(path, quality=90)
+            self.stdout.write(
+                f"{size[0]}x{size[1]} JPEG, {os.path.getsize(path)} bytes, "
+                f"capped at {settings.IMAGE_MAX_DIMENSION}px"
+            )
+
+            for label, ingest in (
+                ("Full decode", full_decode),
+                ("Draft downscale", draft_downscale),
+            ):
+                peak = peak_rss_growth(ingest, path)
+                seconds = measure(lambda: ingest(path), options["repeat"])
+                self.stdout.write(
+                    f"{label}: peak RSS +{megabytes(peak)}, "
+                    f"{seconds * 1000:.0f} ms per upload"
+                )
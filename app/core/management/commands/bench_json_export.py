@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from core.benchmarks import (
+    analyze,
+    bench_user,
+    link_recipes,
+    measure,
+    megabytes,
+    peak_traced_memory,
+    rolled_back
+)
+from core.models import Ingredient, Recipe, Tag
+from core.renderers import FastJSONRenderer, StreamingJSONResponse, orjson
+from recipe.export import recipe_items
+
+
+def rendered_list(user):
+    """Render every recipe at once, as a list response did"""
+    return JSONRenderer().render(list(recipe_items(user)))
+
+
+def streamed(user):
+    """Consume the streamed JSON export, keeping only its size"""
+    return sum(
+        len(part) for part in StreamingJSONResponse(recipe_items(user))
+    )
+
+
+class Command(BaseCommand):
+    """Django command to compare JSON rendering and export memory
+
+    The recipes of a user are rendered by JSONRenderer and by
+    FastJSONRenderer, and the peak memory of rendering them as one list
+    is compared with streaming them as the export does. All data is
+    rolled back afterwards.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=20000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = bench_user()
+            tags = Tag.objects.bulk_create(
+                Tag(user=user, name=f"Tag {i}") for i in range(50)
+            )
+            ingredients = Ingredient.objects.bulk_create(
+                Ingredient(user=user, name=f"Ingredient {i}")
+                for i in range(50)
+            )
+            recipes = Recipe.objects.bulk_create(
+                (
+                    Recipe(user=user, title=f"Recipe {i}", time_minutes=i,
+                           price=i % 100, link="https://example.com")
+                    for i in range(options["recipes"])
+                ),
+                batch_size=1000
+            )
+            link_recipes("tags", recipes, tags, 0, 3)
+            link_recipes("ingredients", recipes, ingredients, 0, 3)
+            analyze(Recipe, Tag, Ingredient)
+
+            self._report_renderers(
+                list(recipe_items(user)), options["repeat"]
+            )
+            self._report_memory(user)
+
+    def _report_renderers(self, items, repeat):
+        content = JSONRenderer().render(items)
+        if FastJSONRenderer().render(items) != content:
+            raise CommandError("FastJSONRenderer output differs")
+
+        if orjson is None:
+            self.stdout.write("orjson is not installed, timing the fallback")
+        self.stdout.write(
+            f"{len(items)} recipes, {megabytes(len(content))} of JSON"
+        )
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            seconds = measure(lambda: renderer.render(items), repeat)
+            self.stdout.write(
+                f"{type(renderer).__name__}: {seconds * 1000:.1f} ms "
+                f"({len(content) / seconds / (1024 * 1024):.0f} MB/sec)"
+            )
+
+    def _report_memory(self, user):
+        for label, export in (
+            ("Rendered list", rendered_list),
+            ("Streamed export", streamed),
+        ):
+            peak = peak_traced_memory(export, user)
+            self.stdout.write(f"{label}: peak memory {megabytes(peak)}")
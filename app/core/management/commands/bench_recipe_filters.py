@@ -0,0 +1,108 @@
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import (
+    analyze,
+    bench_user,
+    link_recipes,
+    measure,
+    rolled_back
+)
+from core.models import Ingredient, Recipe, Tag
+from recipe.filters import MATCH_ANY, filter_by_related
+
+
+RELATIONS = {"tags": Tag, "ingredients": Ingredient}
+
+
+def joined(recipes, ids):
+    """Filter recipes by chained M2M joins, as before filter_by_related"""
+    for name in RELATIONS:
+        recipes = recipes.filter(**{f"{name}__id__in": ids[name]})
+    return recipes.distinct()
+
+
+def exists(recipes, ids):
+    """Filter recipes with EXISTS subqueries through filter_by_related"""
+    for name in RELATIONS:
+        recipes = filter_by_related(recipes, name, ids[name], MATCH_ANY)
+    return recipes
+
+
+class Command(BaseCommand):
+    """Django command to time recipe tag and ingredient filters
+
+    Recipes are linked to a growing number of tags and ingredients, and
+    the first page of ?tags=&ingredients= is timed with chained joins
+    and with EXISTS subqueries. All data is rolled back afterwards.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=10000)
+        parser.add_argument("--names", type=int, default=50)
+        parser.add_argument(
+            "--links",
+            type=int,
+            nargs="+",
+            default=[1, 5, 20],
+            help="Tags and ingredients per recipe to measure"
+        )
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = bench_user()
+            related = {
+                name: model.objects.bulk_create(
+                    model(user=user, name=f"{name} {i}")
+                    for i in range(options["names"])
+                )
+                for name, model in RELATIONS.items()
+            }
+            ids = {
+                name: [obj.pk for obj in objects[:3]]
+                for name, objects in related.items()
+            }
+            recipes = Recipe.objects.bulk_create(
+                (
+                    Recipe(user=user, title=f"Recipe {i}", time_minutes=i,
+                           price=1)
+                    for i in range(options["recipes"])
+                ),
+                batch_size=1000
+            )
+
+            linked = 0
+            for links in sorted(options["links"]):
+                for name, objects in related.items():
+                    link_recipes(name, recipes, objects, linked, links)
+                linked = links
+                analyze(
+                    Recipe, Recipe.tags.through, Recipe.ingredients.through
+                )
+                self._report(user, ids, links, options)
+
+    def _report(self, user, ids, links, options):
+        recipes = Recipe.objects.filter(user=user).order_by("-id")
+        page = options["page_size"]
+        for label, query in (("joins", joined), ("exists", exists)):
+            first_page = measure(
+                lambda: list(query(recipes, ids).values_list("id")[:page]),
+                options["repeat"]
+            )
+            every_row = measure(
+                lambda: list(query(recipes, ids).values_list("id")),
+                options["repeat"]
+            )
+            self.stdout.write(
+                f"{links} links per relation, {label}: "
+                f"first page {first_page * 1000:.1f} ms, "
+                f"all {query(recipes, ids).count()} recipes "
+                f"{every_row * 1000:.1f} ms"
+            )
+
+        joined_rows = recipes.filter(
+            tags__id__in=ids["tags"],
+            ingredients__id__in=ids["ingredients"]
+        ).count()
+        self.stdout.write(f"  joins produce {joined_rows} rows to dedupe")
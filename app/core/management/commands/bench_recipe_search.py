@@ -0,0 +1,92 @@
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import (
+    analyze,
+    bench_user,
+    percentile,
+    random_names,
+    rolled_back,
+    timings
+)
+from core.models import Recipe
+from recipe.search import search_recipes, search_vector
+
+
+COMMON_WORD = "chicken"
+COMMON_EVERY = 4
+UNCOMMON_WORD = "saffron"
+UNCOMMON_EVERY = 100
+
+
+def recipe_title(index, name):
+    """Return a made up title, adding shared words to some recipes"""
+    words = [name]
+    if index % COMMON_EVERY == 0:
+        words.append(COMMON_WORD)
+    if index % UNCOMMON_EVERY == 0:
+        words.append(UNCOMMON_WORD)
+
+    return " ".join(words)
+
+
+class Command(BaseCommand):
+    """Django command to time ranked recipe search at scale
+
+    A user is given --recipes recipes with made up titles, some sharing
+    an uncommon or a common word, and the first page of ?search= is
+    timed for selective and common terms, reporting the p50 and p95.
+    All data is rolled back afterwards.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=1000000)
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = bench_user()
+            names = random_names(options["recipes"])
+            Recipe.objects.bulk_create(
+                (
+                    Recipe(user=user, title=recipe_title(index, name),
+                           time_minutes=10, price=1)
+                    for index, name in enumerate(names)
+                ),
+                batch_size=5000
+            )
+            Recipe.objects.filter(user=user).update(
+                search_vector=search_vector()
+            )
+            analyze(Recipe)
+
+            recipes = Recipe.objects.filter(user=user).order_by("-id")
+            step = max(len(names) // 20, 1)
+            self.stdout.write(f"Search over {len(names)} recipes")
+            for label, queries in (
+                ("selective", names[step // 2::step][:20]),
+                ("uncommon", [UNCOMMON_WORD]),
+                ("common", [COMMON_WORD]),
+            ):
+                self._report(recipes, label, queries, options)
+
+    def _report(self, recipes, label, queries, options):
+        page = options["page_size"]
+
+        def first_page(query):
+            return list(
+                search_recipes(recipes, query).order_by("-rank", "-id")
+                .values_list("id", flat=True)[:page]
+            )
+
+        results = []
+        for index in range(options["repeat"]):
+            query = queries[index % len(queries)]
+            results.extend(timings(lambda: first_page(query), 1))
+
+        matches = search_recipes(recipes, queries[0]).count()
+        self.stdout.write(
+            f"{label} ({matches} matches for {queries[0]!r}): "
+            f"p50 {percentile(results, 50) * 1000:.1f} ms, "
+            f"p95 {percentile(results, 95) * 1000:.1f} ms"
+        )
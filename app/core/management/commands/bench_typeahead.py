@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.benchmarks import (
+    analyze,
+    bench_user,
+    measure,
+    random_names,
+    rolled_back
+)
+from core.models import Tag
+from recipe.search import typeahead
+
+
+QUERIES = ("c", "ch", "chi", "chil", "chilo", "tomatp")
+
+
+class Command(BaseCommand):
+    """Django command to time tag typeahead against many names
+
+    A user is given --names tags, and typeahead queries from one letter
+    up to a misspelling are timed with the trigram index and with index
+    scans disabled. All data is rolled back afterwards.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--names", type=int, default=100000)
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = bench_user()
+            Tag.objects.bulk_create(
+                (
+                    Tag(user=user, name=name)
+                    for name in random_names(options["names"])
+                ),
+                batch_size=5000
+            )
+            analyze(Tag)
+            tags = Tag.objects.filter(user=user)
+
+            indexed = self._time(tags, options)
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_bitmapscan = off")
+                cursor.execute("SET LOCAL enable_indexscan = off")
+            scanned = self._time(tags, options)
+
+        self.stdout.write(f"Typeahead over {options['names']} names")
+        for query in QUERIES:
+            self.stdout.write(
+                f"q={query}: trigram index {indexed[query] * 1000:.1f} ms, "
+                f"without index {scanned[query] * 1000:.1f} ms"
+            )
+
+    def _time(self, tags, options):
+        """Return the median seconds of each typeahead query"""
+        return {
+            query: measure(
+                lambda: list(typeahead(tags, query, options["limit"])),
+                options["repeat"]
+            )
+            for query in QUERIES
+        }
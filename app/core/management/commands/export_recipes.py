@@ -0,0 +1,48 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.export import EXPORT_FORMATS, export_recipes
+
+
+class Command(BaseCommand):
+    """Django command to export a user's recipes as NDJSON or CSV"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("email")
+        parser.add_argument(
+            "--format",
+            dest="export_format",
+            choices=tuple(EXPORT_FORMATS),
+            default="ndjson"
+        )
+        parser.add_argument(
+            "--output",
+            help="File to write to instead of stdout"
+        )
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("--chunk-size", type=int)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options["email"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        content = export_recipes(
+            user,
+            options["export_format"],
+            compress=options["gzip"],
+            chunk_size=options["chunk_size"]
+        )
+        if options["output"]:
+            with open(options["output"], "wb") as output:
+                self._write(output, content)
+        else:
+            self._write(sys.stdout.buffer, content)
+
+    def _write(self, output, content):
+        for chunk in content:
+            output.write(chunk)
+        output.flush()
@@ -0,0 +1,123 @@
+import os
+import time
+from itertools import islice
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe, RecipeImageUpload
+from recipe.images import UPLOADS_DIR, rendition_image_names, rendition_stem
+from recipe.uploads import expire_uploads
+
+
+def walk_files(root):
+    """Yield (path, stat) for every file under root, lazily"""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry.path, entry.stat()
+
+
+def batches(iterable, size):
+    """Split an iterable into lists of at most size items"""
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+class Command(BaseCommand):
+    """Django command to delete recipe images no recipe references
+
+    Chunked uploads older than IMAGE_UPLOAD_EXPIRY are expired first,
+    so their partial files are reclaimed too.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=3600,
+            help="Skip files modified less than this many seconds ago"
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        expired = expire_uploads(dry_run=options["dry_run"])
+        if expired:
+            verb = "Would expire" if options["dry_run"] else "Expired"
+            self.stdout.write(f"{verb} {expired} unfinished uploads")
+
+        root = default_storage.path(UPLOADS_DIR)
+        if not os.path.isdir(root):
+            self.stdout.write("No recipe images found")
+            return
+
+        cutoff = time.time() - options["min_age"]
+        scanned = deleted = freed = 0
+        files = (
+            (path, stat) for path, stat in walk_files(root)
+            if stat.st_mtime < cutoff
+        )
+        for batch in batches(files, options["batch_size"]):
+            scanned += len(batch)
+            names = {
+                os.path.relpath(path, default_storage.location)
+                .replace(os.sep, "/"): (path, stat)
+                for path, stat in batch
+            }
+            for name in self._unreferenced(names):
+                path, stat = names[name]
+                if not options["dry_run"]:
+                    os.remove(path)
+                deleted += 1
+                freed += stat.st_size
+
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {scanned} files. {verb} {deleted} files "
+            f"({freed} bytes)"
+        ))
+
+    def _unreferenced(self, names):
+        """Return the names in a batch that nothing references"""
+        originals, renditions, parts = [], {}, []
+        for name in names:
+            stem = rendition_stem(name)
+            if stem:
+                renditions.setdefault(stem, []).append(name)
+            elif name.endswith(".part"):
+                parts.append(name)
+            else:
+                originals.append(name)
+
+        referenced = set(
+            Recipe.objects.filter(image__in=originals)
+            .values_list("image", flat=True)
+        )
+        referenced.update(
+            path + ".part" for path in RecipeImageUpload.objects.filter(
+                path__in=[name[:-len(".part")] for name in parts]
+            ).values_list("path", flat=True)
+        )
+        if renditions:
+            candidates = {
+                image: stem
+                for stem in renditions
+                for image in rendition_image_names(stem)
+            }
+            referenced.update(
+                name
+                for image in Recipe.objects.filter(
+                    image__in=candidates
+                ).values_list("image", flat=True)
+                for name in renditions[candidates[image]]
+            )
+
+        return [name for name in names if name not in referenced]
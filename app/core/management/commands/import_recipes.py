@@ -0,0 +1,292 @@
+import csv
+import gzip
+import io
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Recipe
+from recipe.cache import bump_version
+from recipe.search import update_search_vector
+from recipe.stats import adjust_totals
+
+
+RELATIONS = ("tags", "ingredients")
+
+STAGE_RECIPES = """
+    CREATE TEMPORARY TABLE import_recipe (
+        line integer PRIMARY KEY,
+        title varchar(255) NOT NULL,
+        time_minutes integer NOT NULL,
+        price numeric(5, 2) NOT NULL,
+        link varchar(255) NOT NULL,
+        id integer
+    )
+"""
+
+STAGE_RELATIONS = """
+    CREATE TEMPORARY TABLE import_relation (
+        line integer NOT NULL,
+        relation varchar(20) NOT NULL,
+        name varchar(255) NOT NULL
+    )
+"""
+
+
+def read_records(path, export_format):
+    """Yield the recipes of an NDJSON or CSV file as dicts"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as source:
+        if export_format == "csv":
+            yield from csv.DictReader(source)
+        else:
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def related_names(relation, value):
+    """Return names from a list of names or objects, or a ; joined string
+
+    Raises ValueError for anything else, such as the ids of a list
+    response, so the record is reported rather than crashing the import.
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(";")
+    if not isinstance(value, list):
+        raise ValueError(f"{relation} must be a list of names")
+
+    names = []
+    for item in value:
+        if isinstance(item, dict):
+            item = item.get("name")
+        if not isinstance(item, str):
+            raise ValueError(
+                f"{relation} must be names or objects with a name, "
+                f"got {item!r}"
+            )
+        names.append(item.strip())
+
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def check_field(model, name, value, label=None):
+    """Raise ValueError unless value fits the column of a model field"""
+    try:
+        model._meta.get_field(name).run_validators(value)
+    except ValidationError as exc:
+        raise ValueError(f"invalid {label or name}: {' '.join(exc.messages)}")
+
+
+def clean_record(record):
+    """Return the recipe columns and related names of a record
+
+    Values are checked against the model fields, so a record that does
+    not fit its columns is reported instead of failing the COPY.
+    """
+    try:
+        title = record["title"].strip()
+        time_minutes = int(record["time_minutes"])
+        price = Decimal(str(record["price"]))
+        link = str(record.get("link") or "")
+    except (KeyError, AttributeError, TypeError, ValueError,
+            InvalidOperation) as exc:
+        raise ValueError(f"invalid or missing field {exc}")
+    if not title:
+        raise ValueError("title is required")
+    if not price.is_finite():
+        raise ValueError("price must be a finite number")
+
+    columns = (title, time_minutes, price, link)
+    for name, value in zip(("title", "time_minutes", "price", "link"),
+                           columns):
+        check_field(Recipe, name, value)
+
+    relations = {
+        name: related_names(name, record.get(name)) for name in RELATIONS
+    }
+    for relation, names in relations.items():
+        model = Recipe._meta.get_field(relation).related_model
+        for name in names:
+            check_field(model, "name", name, label=f"{relation} name")
+
+    return columns, relations
+
+
+def copy_rows(cursor, table, columns, rows):
+    """Load rows into a table with a single COPY"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    # Empty fields are empty strings; no value is ever NULL
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) "
+        "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+        buffer
+    )
+
+
+class Command(BaseCommand):
+    """Django command to bulk load a user's recipes from NDJSON or CSV
+
+    Each batch is staged in temporary tables with COPY and moved into
+    place with set based INSERT ... SELECT statements in one transaction.
+    Tags and ingredients are matched or created by name, and the user's
+    recipe stats are updated with each batch.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("email")
+        parser.add_argument("path", help="NDJSON or CSV file, may be .gz")
+        parser.add_argument(
+            "--format",
+            dest="export_format",
+            choices=("ndjson", "csv"),
+            help="Defaults to csv for .csv files and ndjson otherwise"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Recipes loaded and committed per transaction"
+        )
+        parser.add_argument(
+            "--skip",
+            type=int,
+            default=0,
+            help="Records to skip, to resume an interrupted import"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options["email"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        path = options["path"]
+        export_format = options["export_format"] or (
+            "csv" if path.endswith((".csv", ".csv.gz")) else "ndjson"
+        )
+        records = islice(
+            read_records(path, export_format), options["skip"], None
+        )
+
+        started = time.monotonic()
+        loaded = options["skip"]
+        batch = list(islice(records, options["batch_size"]))
+        while batch:
+            self._load(user, loaded, batch)
+            loaded += len(batch)
+            self.stdout.write(
+                f"Committed {loaded} records "
+                f"({self._rate(loaded - options['skip'], started)})"
+            )
+            batch = list(islice(records, options["batch_size"]))
+
+        bump_version(user.id)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {loaded - options['skip']} recipes "
+            f"({self._rate(loaded - options['skip'], started)})"
+        ))
+
+    def _rate(self, count, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        return f"{count / elapsed:.0f} rows/sec"
+
+    @transaction.atomic
+    def _load(self, user, offset, records):
+        """Insert a batch of records and link their relations"""
+        recipe_rows, relation_rows = [], []
+        for line, record in enumerate(records, start=offset + 1):
+            try:
+                columns, relations = clean_record(record)
+            except ValueError as exc:
+                raise CommandError(f"Record {line}: {exc}")
+            recipe_rows.append((line,) + columns)
+            relation_rows.extend(
+                (line, relation, name)
+                for relation, names in relations.items()
+                for name in names
+            )
+
+        recipe_table = Recipe._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(STAGE_RECIPES)
+            cursor.execute(STAGE_RELATIONS)
+            copy_rows(
+                cursor,
+                "import_recipe",
+                ("line", "title", "time_minutes", "price", "link"),
+                recipe_rows
+            )
+            copy_rows(
+                cursor,
+                "import_relation",
+                ("line", "relation", "name"),
+                relation_rows
+            )
+
+            cursor.execute(
+                "UPDATE import_recipe "
+                "SET id = nextval(pg_get_serial_sequence(%s, 'id'))",
+                [recipe_table]
+            )
+            cursor.execute(
+                f"INSERT INTO {recipe_table} (id, user_id, title, "
+                "time_minutes, price, link, image, image_renditions) "
+                "SELECT id, %s, title, time_minutes, price, link, NULL, "
+                "'{}' FROM import_recipe",
+                [user.id]
+            )
+            for relation in RELATIONS:
+                self._link(cursor, user, relation)
+
+            cursor.execute("SELECT id FROM import_recipe")
+            update_search_vector(row[0] for row in cursor.fetchall())
+            cursor.execute("DROP TABLE import_recipe, import_relation")
+
+        adjust_totals(user.id, added=[
+            (price, time_minutes)
+            for _, _, time_minutes, price, _ in recipe_rows
+        ])
+
+    def _link(self, cursor, user, relation):
+        """Create missing related objects by name and link them in bulk"""
+        field = Recipe._meta.get_field(relation)
+        related_table = field.related_model._meta.db_table
+        through_table = field.remote_field.through._meta.db_table
+        source = field.m2m_column_name()
+        target = field.m2m_reverse_name()
+
+        cursor.execute(
+            f"INSERT INTO {related_table} (user_id, name, recipe_count) "
+            "SELECT DISTINCT %s, name, 0 FROM import_relation "
+            "WHERE relation = %s "
+            "ON CONFLICT (user_id, name) DO NOTHING",
+            [user.id, relation]
+        )
+        cursor.execute(
+            f"INSERT INTO {through_table} ({source}, {target}) "
+            "SELECT DISTINCT r.id, t.id FROM import_relation rel "
+            "JOIN import_recipe r ON r.line = rel.line "
+            f"JOIN {related_table} t "
+            "ON t.user_id = %s AND t.name = rel.name "
+            "WHERE rel.relation = %s",
+            [user.id, relation]
+        )
+        cursor.execute(
+            f"UPDATE {related_table} t "
+            "SET recipe_count = t.recipe_count + c.n FROM ("
+            "SELECT name, count(DISTINCT line) AS n FROM import_relation "
+            "WHERE relation = %s GROUP BY name"
+            ") c WHERE t.user_id = %s AND t.name = c.name",
+            [relation, user.id]
+        )
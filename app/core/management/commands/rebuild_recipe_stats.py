@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    """Django command to recompute recipe stats from the recipes"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "emails",
+            nargs="*",
+            help="Users to rebuild; all users when omitted"
+        )
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options["emails"]:
+            user_ids = list(
+                get_user_model().objects.filter(
+                    email__in=options["emails"]
+                ).values_list("id", flat=True)
+            )
+            if len(user_ids) != len(set(options["emails"])):
+                raise CommandError("Unknown user email given")
+
+        rebuild_stats(user_ids)
+        self.stdout.write(self.style.SUCCESS("Recipe stats rebuilt"))
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+from recipe.images import render_image
+
+
+class Command(BaseCommand):
+    """Django command to render recipe images that have no renditions
+
+    Renditions are normally built by the in-process worker pool after an
+    upload commits, so work lost to a restart or a failed render, and
+    images uploaded before renditions existed, are picked up here. Run
+    it again to retry images that failed.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            help="Render at most this many images"
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        pending = Recipe.objects.exclude(image="").filter(
+            image__isnull=False,
+            image_renditions={}
+        ).order_by("id").values_list("id", "image")
+        if options["limit"] is not None:
+            pending = pending[:options["limit"]]
+
+        if options["dry_run"]:
+            self.stdout.write(f"Would render {pending.count()} images")
+            return
+
+        rendered = failed = 0
+        for recipe_id, image_name in pending.iterator():
+            try:
+                render_image(recipe_id, image_name)
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"Recipe {recipe_id}: {exc}")
+            else:
+                rendered += 1
+
+        style = self.style.WARNING if failed else self.style.SUCCESS
+        self.stdout.write(style(
+            f"Rendered {rendered} images, {failed} failed"
+        ))
@@ -0,0 +1,42 @@
+# Generated by Django 3.1.14 on 2026-10-18 09:39
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Merge tags and ingredients sharing a name for the same user"""
+    Recipe = apps.get_model('core', 'Recipe')
+    for model_name, field_name in (('Tag', 'tags'), ('Ingredient', 'ingredients')):
+        model = apps.get_model('core', model_name)
+        through = Recipe._meta.get_field(field_name).remote_field.through
+        target = model_name.lower() + '_id'
+        duplicates = model.objects.values('user', 'name').annotate(
+            keep=Min('id'),
+            count=models.Count('id'),
+        ).filter(count__gt=1)
+        for group in duplicates.iterator():
+            others = model.objects.filter(
+                user=group['user'],
+                name=group['name'],
+            ).exclude(id=group['keep'])
+            links = through.objects.filter(**{target + '__in': others})
+            through.objects.bulk_create(
+                [
+                    through(recipe_id=recipe_id, **{target: group['keep']})
+                    for recipe_id in links.values_list('recipe_id', flat=True)
+                ],
+                ignore_conflicts=True,
+            )
+            others.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_recipe_attr_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 3.1.14 on 2026-10-18 10:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BACKFILL_RECIPE_STATS = """
+INSERT INTO core_recipestats (
+    user_id, recipe_count, price_total, price_min, price_max,
+    time_total, time_min, time_max
+)
+SELECT user_id, count(*), sum(price), min(price), max(price),
+    sum(time_minutes), min(time_minutes), max(time_minutes)
+FROM core_recipe GROUP BY user_id;
+
+UPDATE core_tag t SET recipe_count = c.n FROM (
+    SELECT tag_id, count(*) AS n FROM core_recipe_tags GROUP BY tag_id
+) c WHERE c.tag_id = t.id;
+
+UPDATE core_ingredient i SET recipe_count = c.n FROM (
+    SELECT ingredient_id, count(*) AS n FROM core_recipe_ingredients
+    GROUP BY ingredient_id
+) c WHERE c.ingredient_id = i.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0013_name_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('recipe_count', models.IntegerField(default=0)),
+                ('price_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('price_min', models.DecimalField(decimal_places=2, max_digits=5, null=True)),
+                ('price_max', models.DecimalField(decimal_places=2, max_digits=5, null=True)),
+                ('time_total', models.BigIntegerField(default=0)),
+                ('time_min', models.IntegerField(null=True)),
+                ('time_max', models.IntegerField(null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipe_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(BACKFILL_RECIPE_STATS, migrations.RunSQL.noop),
+    ]
@@ -1,6 +1,9 @@
+import hashlib
 import uuid
 import os
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -10,9 +13,31 @@ from django.contrib.auth.models import (
 from django.conf import settings
 
 
+def content_image_path(content, ext):
+    """Generate a recipe image path from a hash of the file content"""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in iter(lambda: content.read(64 * 1024), b""):
+        digest.update(chunk)
+    content.seek(0)
+    digest = digest.hexdigest()
+
+    return os.path.join(
+        "uploads/recipe/", digest[:2], digest[2:4], f"{digest}.{ext.lower()}"
+    )
+
+
 def recipe_image_file_path(instance, filename):
-    """Generate file path for new recipe image"""
+    """Generate file path for new recipe image
+
+    Uploads get a content addressed path, so identical images are stored
+    once; a random name is used when the content is not available.
+    """
     ext = filename.split(".")[-1]
+    image = getattr(instance, "image", None)
+    if image and not image._committed:
+        return content_image_path(image.file, ext)
+
     filename = f"{uuid.uuid4()}.{ext}"
 
     return os.path.join("uploads/recipe/", filename)
@@ -62,6 +87,26 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    recipe_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "name", "id"],
+                name="tag_user_name_id_idx"
+            ),
+            GinIndex(
+                fields=["name"],
+                name="tag_name_trgm_idx",
+                opclasses=["gin_trgm_ops"]
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"],
+                name="tag_user_name_unique"
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -74,6 +119,26 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    recipe_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "name", "id"],
+                name="ingredient_user_name_id_idx"
+            ),
+            GinIndex(
+                fields=["name"],
+                name="ingredient_name_trgm_idx",
+                opclasses=["gin_trgm_ops"]
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"],
+                name="ingredient_user_name_unique"
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -92,6 +157,68 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField("Ingredient")
     tags = models.ManyToManyField("Tag")
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image_renditions = models.JSONField(default=dict, blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "id"], name="recipe_user_id_idx"),
+            models.Index(
+                fields=["user", "time_minutes", "id"],
+                name="recipe_user_time_id_idx"
+            ),
+            models.Index(
+                fields=["user", "price", "id"],
+                name="recipe_user_price_id_idx"
+            ),
+            models.Index(fields=["image"], name="recipe_image_idx"),
+            GinIndex(fields=["search_vector"], name="recipe_search_idx"),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class RecipeStats(models.Model):
+    """Running totals of a user's recipes, kept up to date on writes"""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True
+    )
+    recipe_count = models.IntegerField(default=0)
+    price_total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0
+    )
+    price_min = models.DecimalField(max_digits=5, decimal_places=2, null=True)
+    price_max = models.DecimalField(max_digits=5, decimal_places=2, null=True)
+    time_total = models.BigIntegerField(default=0)
+    time_min = models.IntegerField(null=True)
+    time_max = models.IntegerField(null=True)
+
+    @property
+    def price_avg(self):
+        if self.recipe_count:
+            return self.price_total / self.recipe_count
+
+    @property
+    def time_avg(self):
+        if self.recipe_count:
+            return self.time_total / self.recipe_count
+
+    def __str__(self):
+        return f"Recipe stats of {self.user_id}"
+
+
+class RecipeImageUpload(models.Model):
+    """Resumable chunked upload of a recipe image"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    recipe = models.ForeignKey("Recipe", on_delete=models.CASCADE)
+    path = models.CharField(max_length=255)
+    offset = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.path
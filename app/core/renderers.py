@@ -0,0 +1,88 @@
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+def _escape_line_separators(content):
+    """Escape U+2028 and U+2029 so the output is a JavaScript subset"""
+    return content.replace(
+        b"\xe2\x80\xa8", b"\\u2028"
+    ).replace(
+        b"\xe2\x80\xa9", b"\\u2029"
+    )
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON renderer encoding with orjson when it is installed
+
+    The output matches JSONRenderer's compact, unicode output for the
+    values this API returns, with two differences: floats in exponent
+    form are written as 1e16 rather than 1e+16, and NaN and infinite
+    floats become null where JSONRenderer raises. Types orjson does not
+    handle natively, including datetimes so their format is unchanged,
+    go through the encoder class. Indented output, other JSON settings,
+    a missing orjson or values orjson rejects fall back to JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is None:
+            content = self.encode(data)
+            if content is not None:
+                return content
+
+        return super().render(data, accepted_media_type, renderer_context)
+
+    def encode(self, data):
+        """Return data as compact JSON, or None if orjson cannot encode it"""
+        if orjson is None or not self.compact or self.ensure_ascii:
+            return None
+
+        try:
+            content = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_NON_STR_KEYS
+            )
+        except TypeError:
+            return None
+
+        return _escape_line_separators(content)
+
+    def stream(self, items):
+        """Yield a JSON array of items, encoding one item at a time"""
+        buffer = [b"["]
+        size = 1
+        for index, item in enumerate(items):
+            content = self.encode(item)
+            if content is None:
+                content = super().render(item)
+            if index:
+                buffer.append(b",")
+            buffer.append(content)
+            size += len(content) + 1
+            if size >= STREAM_BUFFER_SIZE:
+                yield b"".join(buffer)
+                buffer, size = [], 0
+        buffer.append(b"]")
+        yield b"".join(buffer)
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """Response writing an iterable as a JSON array as it is consumed"""
+
+    def __init__(self, items, renderer=None, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        renderer = renderer or FastJSONRenderer()
+        super().__init__(renderer.stream(items), **kwargs)
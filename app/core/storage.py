@@ -0,0 +1,55 @@
+import os
+import re
+
+from django.core.files.storage import FileSystemStorage
+
+
+CONTENT_ADDRESSED_PATH = re.compile(
+    r"^uploads/recipe/(?:"
+    r"[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.\w+"
+    r"|renditions/[0-9a-f]{64}/\w+\.\w+"
+    r")$"
+)
+
+
+def is_content_addressed(name):
+    """Return whether a storage path is derived from its file content"""
+    return bool(CONTENT_ADDRESSED_PATH.match(name.replace("\\", "/")))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage keeping a single copy of identical images
+
+    A content addressed file that already exists holds the same bytes,
+    so saving it again reuses the stored copy instead of writing a new
+    file under a different name. A reused copy is touched, so image
+    release and garbage collection, which skip recently modified files,
+    leave it alone while the recipe referencing it is saved. New files
+    are written to a temporary name and renamed into place, so
+    concurrent saves cannot conflict.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        if is_content_addressed(name):
+            return name
+
+        return super().get_available_name(name, max_length)
+
+    def _save(self, name, content):
+        if not is_content_addressed(name):
+            return super()._save(name, content)
+
+        if not self.reuse(name):
+            temp_name = super()._save(f"{name}.tmp", content)
+            os.replace(self.path(temp_name), self.path(name))
+
+        return name
+
+    def reuse(self, name):
+        """Touch a stored file about to be reused; False if it is missing"""
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+
+        return True
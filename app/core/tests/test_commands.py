@@ -1,7 +1,22 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from core.models import Recipe, RecipeImageUpload, RecipeStats, Tag
 
 
 class CommandTests(TestCase):
@@ -20,3 +35,471 @@ class CommandTests(TestCase):
             gi.side_effect = [OperationalError] * 5 + [True]
             call_command("wait_for_db")
             self.assertEqual(gi.call_count, 6)
+
+
+class GcRecipeImagesTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root.name
+        )
+        self.settings_override.enable()
+        self.user = get_user_model().objects.create_user(
+            "test@outlook.com",
+            "test123"
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.media_root.cleanup()
+
+    def _write(self, name):
+        path = default_storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as image_file:
+            image_file.write(b"image")
+        return path
+
+    def test_gc_deletes_unreferenced_images(self):
+        """Test unreferenced images and renditions are deleted"""
+        kept = "uploads/recipe/aa/aa/" + "a" * 64 + ".jpg"
+        dropped = "uploads/recipe/cc/cc/" + "c" * 64 + ".jpg"
+        Recipe.objects.create(
+            user=self.user,
+            title="Curry",
+            time_minutes=10,
+            price=5.00,
+            image=kept
+        )
+        paths = {
+            name: self._write(name) for name in (
+                kept,
+                dropped,
+                f"uploads/recipe/renditions/{'a' * 64}/card.jpeg",
+                f"uploads/recipe/renditions/{'c' * 64}/card.jpeg",
+            )
+        }
+
+        out = StringIO()
+        call_command("gc_recipe_images", min_age=-60, batch_size=1, stdout=out)
+
+        remaining = {name for name, path in paths.items()
+                     if os.path.exists(path)}
+        self.assertEqual(remaining, {
+            kept,
+            f"uploads/recipe/renditions/{'a' * 64}/card.jpeg",
+        })
+        self.assertIn("Deleted 2 files", out.getvalue())
+
+    def test_gc_keeps_renditions_of_missing_images(self):
+        """Test renditions stay referenced when their image file is gone"""
+        Recipe.objects.create(
+            user=self.user,
+            title="Curry",
+            time_minutes=10,
+            price=5.00,
+            image="uploads/recipe/ee/ee/" + "e" * 64 + ".png"
+        )
+        path = self._write(f"uploads/recipe/renditions/{'e' * 64}/card.jpeg")
+
+        call_command("gc_recipe_images", min_age=-60, stdout=StringIO())
+
+        self.assertTrue(os.path.exists(path))
+
+    def test_gc_expires_stale_uploads(self):
+        """Test unfinished uploads past their expiry are removed"""
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title="Curry",
+            time_minutes=10,
+            price=5.00
+        )
+        stale, fresh = [
+            RecipeImageUpload.objects.create(
+                recipe=recipe,
+                path=f"uploads/recipe/{name}.jpg"
+            )
+            for name in ("stale", "fresh")
+        ]
+        RecipeImageUpload.objects.filter(pk=stale.pk).update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+        stale_part = self._write(stale.path + ".part")
+        fresh_part = self._write(fresh.path + ".part")
+
+        out = StringIO()
+        call_command("gc_recipe_images", min_age=-60, stdout=out)
+
+        self.assertFalse(os.path.exists(stale_part))
+        self.assertTrue(os.path.exists(fresh_part))
+        self.assertEqual(
+            list(RecipeImageUpload.objects.values_list("pk", flat=True)),
+            [fresh.pk]
+        )
+        self.assertIn("Expired 1 unfinished uploads", out.getvalue())
+
+    def test_gc_dry_run_keeps_files(self):
+        """Test a dry run reports but does not delete files"""
+        path = self._write("uploads/recipe/orphan.jpg")
+
+        call_command("gc_recipe_images", min_age=-60, dry_run=True,
+                     stdout=StringIO())
+
+        self.assertTrue(os.path.exists(path))
+
+    def test_gc_skips_recent_files(self):
+        """Test files newer than the minimum age are kept"""
+        path = self._write("uploads/recipe/orphan.jpg")
+
+        call_command("gc_recipe_images", stdout=StringIO())
+
+        self.assertTrue(os.path.exists(path))
+
+
+class RenderRecipeImagesTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root.name
+        )
+        self.settings_override.enable()
+        self.user = get_user_model().objects.create_user(
+            "test@outlook.com",
+            "test123"
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.media_root.cleanup()
+
+    def _recipe(self, image=None, **params):
+        return Recipe.objects.create(
+            user=self.user,
+            title="Curry",
+            time_minutes=10,
+            price=5.00,
+            image=image,
+            **params
+        )
+
+    def test_render_recipe_images_without_renditions(self):
+        """Test only images without renditions are rendered"""
+        name = "uploads/recipe/photo.jpg"
+        path = default_storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        Image.new("RGB", (200, 100)).save(path, format="JPEG")
+        pending = self._recipe(name)
+        done = self._recipe(name, image_renditions={"card": {}})
+        self._recipe()
+
+        out = StringIO()
+        call_command("render_recipe_images", stdout=out)
+
+        pending.refresh_from_db()
+        done.refresh_from_db()
+        self.assertIn("thumbnail", pending.image_renditions)
+        self.assertEqual(done.image_renditions, {"card": {}})
+        self.assertIn("Rendered 1 images, 0 failed", out.getvalue())
+
+    def test_render_recipe_images_reports_failures(self):
+        """Test a missing image is reported and the others still render"""
+        missing = self._recipe("uploads/recipe/missing.jpg")
+
+        out, err = StringIO(), StringIO()
+        call_command("render_recipe_images", stdout=out, stderr=err)
+        dry_run = StringIO()
+        call_command("render_recipe_images", dry_run=True, stdout=dry_run)
+
+        missing.refresh_from_db()
+        self.assertEqual(missing.image_renditions, {})
+        self.assertIn(f"Recipe {missing.id}:", err.getvalue())
+        self.assertIn("Rendered 0 images, 1 failed", out.getvalue())
+        self.assertIn("Would render 1 images", dry_run.getvalue())
+
+
+class ExportRecipesTests(TestCase):
+
+    def test_export_recipes_to_file(self):
+        """Test the command writes a user's recipes as gzipped NDJSON"""
+        user = get_user_model().objects.create_user(
+            "test@outlook.com",
+            "test123"
+        )
+        for i in range(3):
+            Recipe.objects.create(
+                user=user,
+                title=f"Recipe {i}",
+                time_minutes=i,
+                price=1
+            )
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "recipes.ndjson.gz")
+            call_command(
+                "export_recipes",
+                user.email,
+                output=path,
+                gzip=True,
+                chunk_size=2
+            )
+            with gzip.open(path) as export:
+                lines = export.read().splitlines()
+
+        self.assertEqual(
+            [json.loads(line)["title"] for line in lines],
+            ["Recipe 0", "Recipe 1", "Recipe 2"]
+        )
+
+    def test_export_recipes_unknown_user(self):
+        """Test exporting for an unknown email fails"""
+        with self.assertRaises(CommandError):
+            call_command("export_recipes", "nobody@outlook.com")
+
+
+class ImportRecipesTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@outlook.com",
+            "test123"
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as output:
+            output.write(content)
+        return path
+
+    def test_import_recipes_ndjson(self):
+        """Test recipes are loaded with existing and new relations"""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        records = [
+            {"title": "Kale salad", "time_minutes": 5, "price": "4.50",
+             "tags": [{"id": 99, "name": "Vegan"}, "Quick"],
+             "ingredients": ["Kale", "Salt"]},
+            {"title": "Toast", "time_minutes": 2, "price": 1,
+             "link": "https://example.com", "tags": ["Quick"]},
+            {"title": "Soup", "time_minutes": 30, "price": "3"},
+        ]
+        path = self.write(
+            "recipes.ndjson",
+            "\n".join(json.dumps(record) for record in records)
+        )
+
+        out = StringIO()
+        call_command(
+            "import_recipes", self.user.email, path,
+            batch_size=2, stdout=out
+        )
+
+        recipes = Recipe.objects.filter(user=self.user).order_by("id")
+        self.assertEqual(
+            [recipe.title for recipe in recipes],
+            ["Kale salad", "Toast", "Soup"]
+        )
+        salad = recipes[0]
+        self.assertEqual(salad.price, Decimal("4.50"))
+        self.assertIn(tag, salad.tags.all())
+        self.assertEqual(
+            sorted(salad.ingredients.values_list("name", flat=True)),
+            ["Kale", "Salt"]
+        )
+        self.assertEqual(
+            Tag.objects.filter(user=self.user, name="Quick").count(),
+            1
+        )
+        self.assertEqual(recipes[1].tags.get().name, "Quick")
+        self.assertIsNotNone(salad.search_vector)
+        self.assertIn("Committed 2 records", out.getvalue())
+        self.assertIn("Imported 3 recipes", out.getvalue())
+        self.assertIn("rows/sec", out.getvalue())
+        stats = RecipeStats.objects.get(user=self.user)
+        self.assertEqual(stats.recipe_count, 3)
+        self.assertEqual(stats.price_max, Decimal("4.50"))
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 1)
+        self.assertEqual(Tag.objects.get(name="Quick").recipe_count, 2)
+
+    def test_import_recipes_csv_resume(self):
+        """Test a gzipped CSV import can skip records already loaded"""
+        path = os.path.join(self.directory.name, "recipes.csv.gz")
+        with gzip.open(path, "wt", encoding="utf-8") as output:
+            output.write(
+                "id,title,time_minutes,price,link,tags,ingredients\n"
+                "1,Loaded,5,1.00,,,\n"
+                "2,Pasta,20,6.25,,Dinner; Quick,Pasta\n"
+            )
+
+        call_command(
+            "import_recipes", self.user.email, path,
+            skip=1, stdout=StringIO()
+        )
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.title, "Pasta")
+        self.assertEqual(
+            sorted(recipe.tags.values_list("name", flat=True)),
+            ["Dinner", "Quick"]
+        )
+
+    def test_import_recipes_invalid_record(self):
+        """Test an invalid record stops the import at its batch"""
+        path = self.write(
+            "recipes.ndjson",
+            '{"title": "Ok", "time_minutes": 1, "price": 1}\n'
+            '{"title": "Bad", "price": 1}\n'
+        )
+
+        with self.assertRaisesMessage(CommandError, "Record 2"):
+            call_command(
+                "import_recipes", self.user.email, path,
+                batch_size=1, stdout=StringIO()
+            )
+
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+
+    def test_import_recipes_values_out_of_range(self):
+        """Test values that do not fit their columns are reported"""
+        records = [
+            ({"price": "NaN"}, "price must be a finite number"),
+            ({"price": "Infinity"}, "price must be a finite number"),
+            ({"price": 1000}, "invalid price"),
+            ({"price": "1.005"}, "invalid price"),
+            ({"title": "x" * 256}, "invalid title"),
+            ({"time_minutes": 2 ** 31}, "invalid time_minutes"),
+            ({"tags": ["x" * 256]}, "invalid tags name"),
+            ({"tags": [1, 2]}, "tags must be names"),
+            ({"ingredients": [{"id": 1}]}, "ingredients must be names"),
+            ({"tags": 5}, "tags must be a list of names"),
+        ]
+        for overrides, message in records:
+            record = {"title": "Ok", "time_minutes": 1, "price": 1}
+            record.update(overrides)
+            path = self.write("recipes.ndjson", json.dumps(record))
+
+            message = f"Record 1: {message}"
+            with self.assertRaisesMessage(CommandError, message):
+                call_command(
+                    "import_recipes", self.user.email, path,
+                    stdout=StringIO()
+                )
+
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+
+class RebuildRecipeStatsTests(TestCase):
+
+    def test_rebuild_recipe_stats(self):
+        """Test stats that drifted from the recipes are recomputed"""
+        user = get_user_model().objects.create_user(
+            "test@outlook.com",
+            "test123"
+        )
+        tag = Tag.objects.create(user=user, name="Vegan")
+        recipe = Recipe.objects.create(
+            user=user,
+            title="Salad",
+            time_minutes=5,
+            price=3
+        )
+        recipe.tags.add(tag)
+        RecipeStats.objects.filter(user=user).update(recipe_count=7)
+        Tag.objects.filter(pk=tag.pk).update(recipe_count=0)
+
+        call_command("rebuild_recipe_stats", user.email, stdout=StringIO())
+
+        self.assertEqual(RecipeStats.objects.get(user=user).recipe_count, 1)
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 1)
+
+    def test_rebuild_recipe_stats_unknown_user(self):
+        """Test rebuilding for an unknown email fails"""
+        with self.assertRaises(CommandError):
+            call_command("rebuild_recipe_stats", "nobody@outlook.com")
+
+
+class BenchmarkCommandsTests(TestCase):
+    """Smoke test the benchmark commands at a tiny scale"""
+
+    def test_bench_image_ingest(self):
+        """Test both ingest paths are measured"""
+        out = StringIO()
+
+        with override_settings(IMAGE_MAX_DIMENSION=50):
+            call_command(
+                "bench_image_ingest", width=200, height=100, repeat=1,
+                stdout=out
+            )
+
+        self.assertIn("Full decode: peak RSS", out.getvalue())
+        self.assertIn("Draft downscale: peak RSS", out.getvalue())
+
+    def test_bench_recipe_filters(self):
+        """Test both filters are timed and their data rolled back"""
+        out = StringIO()
+
+        call_command(
+            "bench_recipe_filters", recipes=20, names=5, links=[1, 2],
+            repeat=1, stdout=out
+        )
+
+        self.assertIn("2 links per relation, exists", out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bench_bulk_recipes(self):
+        """Test single and bulk writes are timed and rolled back"""
+        out = StringIO()
+
+        call_command("bench_bulk_recipes", recipes=3, stdout=out)
+
+        self.assertIn("Single POSTs", out.getvalue())
+        self.assertIn("Bulk endpoint", out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bench_typeahead(self):
+        """Test typeahead is timed with and without the trigram index"""
+        out = StringIO()
+
+        call_command("bench_typeahead", names=50, repeat=1, stdout=out)
+
+        self.assertIn("q=chil: trigram index", out.getvalue())
+        self.assertFalse(Tag.objects.exists())
+
+    def test_bench_list_serializers(self):
+        """Test both list paths are timed with identical output"""
+        out = StringIO()
+
+        call_command(
+            "bench_list_serializers", recipes=20, page_size=5, repeat=1,
+            stdout=out
+        )
+
+        self.assertIn("Recipes (5 rows, identical output)", out.getvalue())
+        self.assertIn("Tags (50 rows, identical output)", out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bench_json_export(self):
+        """Test renderers and export memory are measured and rolled back"""
+        out = StringIO()
+
+        call_command("bench_json_export", recipes=10, repeat=1, stdout=out)
+
+        self.assertIn("FastJSONRenderer:", out.getvalue())
+        self.assertIn("Streamed export: peak memory", out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bench_recipe_search(self):
+        """Test search terms are timed and their data rolled back"""
+        out = StringIO()
+
+        call_command(
+            "bench_recipe_search", recipes=20, repeat=2, stdout=out
+        )
+
+        self.assertIn("selective (", out.getvalue())
+        self.assertIn("common (5 matches for 'chicken')", out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
@@ -1,3 +1,4 @@
+from django.core.files.base import ContentFile
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from core import models
@@ -86,3 +87,14 @@ class ModelTests(TestCase):
 
         exp_path = f"uploads/recipe/{uuid}.jpg"
         self.assertEqual(file_path, exp_path)
+
+    def test_recipe_file_name_content_hash(self):
+        """Test identical uploaded images get the same path"""
+        recipe_1 = models.Recipe(image=ContentFile(b"image", name="a.JPG"))
+        recipe_2 = models.Recipe(image=ContentFile(b"image", name="b.jpg"))
+
+        path_1 = models.recipe_image_file_path(recipe_1, "a.JPG")
+        path_2 = models.recipe_image_file_path(recipe_2, "b.jpg")
+
+        self.assertEqual(path_1, path_2)
+        self.assertRegex(path_1, r"^uploads/recipe/\w{2}/\w{2}/\w{64}\.jpg$")
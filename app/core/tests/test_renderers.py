@@ -0,0 +1,88 @@
+import datetime
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import (
+    FastJSONRenderer,
+    StreamingJSONResponse,
+    orjson
+)
+
+
+SAMPLE = {
+    "id": 1,
+    "title": "Crème brûlée\u2028with a line separator",
+    "price": Decimal("5.50"),
+    "ratio": 0.1,
+    "tags": [1, 2, 3],
+    "created": datetime.datetime(2020, 1, 2, 3, 4, 5, 678901,
+                                 tzinfo=datetime.timezone.utc),
+    "error": gettext_lazy("This field is required."),
+    "link": None,
+}
+
+
+class RendererTests(SimpleTestCase):
+    """Test the fast JSON renderer and streaming response"""
+
+    def test_render_matches_json_renderer(self):
+        """Test the fast renderer outputs the same bytes as JSONRenderer"""
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE),
+            JSONRenderer().render(SAMPLE)
+        )
+
+    def test_render_indented_matches_json_renderer(self):
+        """Test indented output falls back to JSONRenderer"""
+        media_type = "application/json; indent=4"
+
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE, media_type),
+            JSONRenderer().render(SAMPLE, media_type)
+        )
+
+    @patch("core.renderers.orjson", None)
+    def test_render_without_orjson(self):
+        """Test the renderer falls back when orjson is not installed"""
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE),
+            JSONRenderer().render(SAMPLE)
+        )
+
+    def test_render_known_differences(self):
+        """Test the documented differences from JSONRenderer with orjson"""
+        if orjson is None:
+            self.skipTest("orjson is not installed")
+        renderer = FastJSONRenderer()
+
+        self.assertEqual(renderer.render([1e16]), b"[1e16]")
+        self.assertEqual(JSONRenderer().render([1e16]), b"[1e+16]")
+        self.assertEqual(renderer.render([float("nan")]), b"[null]")
+        with self.assertRaises(ValueError):
+            JSONRenderer().render([float("nan")])
+
+    @patch("core.renderers.STREAM_BUFFER_SIZE", 100)
+    def test_streaming_response(self):
+        """Test an iterable is streamed as a JSON array in chunks"""
+        items = ({"id": i, "price": Decimal(i)} for i in range(50))
+
+        response = StreamingJSONResponse(items)
+        chunks = list(response.streaming_content)
+
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(
+            json.loads(b"".join(chunks)),
+            [{"id": i, "price": float(i)} for i in range(50)]
+        )
+
+    def test_streaming_empty_response(self):
+        """Test streaming no items returns an empty JSON array"""
+        response = StreamingJSONResponse(iter(()))
+
+        self.assertEqual(b"".join(response.streaming_content), b"[]")
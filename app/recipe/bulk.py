@@ -0,0 +1,97 @@
+from collections import Counter
+
+from django.db import transaction
+
+from core.models import Recipe
+from recipe.cache import bump_version
+from recipe.search import update_search_vector
+from recipe.stats import (
+    adjust_counts, adjust_totals, linked_counts, recipe_values
+)
+
+
+BATCH_SIZE = 500
+RELATIONS = ("tags", "ingredients")
+
+
+def _link_rows(field_name, recipe_related):
+    """Build through table rows for (recipe, related objects) pairs"""
+    field = Recipe._meta.get_field(field_name)
+    through = field.remote_field.through
+    source = field.m2m_field_name() + "_id"
+    target = field.m2m_reverse_field_name() + "_id"
+
+    return through, [
+        through(**{source: recipe.id, target: obj.pk})
+        for recipe, related in recipe_related
+        for obj in related
+    ]
+
+
+@transaction.atomic
+def bulk_write_recipes(user, items, existing=None):
+    """Create or update recipes and their relations in one transaction
+
+    Each item is a (recipe id or None, validated data) pair; recipes to
+    update are looked up in existing by id. Returns the written recipes
+    in input order. Bulk writes skip model signals, so search vectors,
+    recipe stats and the user's cached lists are updated here.
+    """
+    existing = existing or {}
+    recipes, relations, previous = [], [], []
+    for recipe_id, data in items:
+        data = dict(data)
+        related = {name: data.pop(name, None) for name in RELATIONS}
+        recipe = existing[recipe_id] if recipe_id else Recipe(user=user)
+        if recipe_id:
+            previous.append(recipe_values(recipe))
+        for attr, value in data.items():
+            setattr(recipe, attr, value)
+        recipes.append(recipe)
+        relations.append(related)
+
+    created = [recipe for recipe in recipes if recipe.pk is None]
+    updated = [recipe for recipe in recipes if recipe.pk is not None]
+    updated_ids = {recipe.pk for recipe in updated}
+    Recipe.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    if updated:
+        fields = {
+            attr for recipe_id, data in items if recipe_id
+            for attr in data if attr not in RELATIONS
+        }
+        if fields:
+            Recipe.objects.bulk_update(
+                updated, sorted(fields), batch_size=BATCH_SIZE
+            )
+
+    for name in RELATIONS:
+        pairs = [
+            (recipe, related[name])
+            for recipe, related in zip(recipes, relations)
+            if related[name] is not None
+        ]
+        through, rows = _link_rows(name, pairs)
+        replaced = [
+            recipe.pk for recipe, related in pairs
+            if recipe.pk in updated_ids
+        ]
+        counts = Counter({
+            pk: -count
+            for pk, count in linked_counts(name, replaced).items()
+        })
+        through.objects.filter(recipe_id__in=replaced).delete()
+        through.objects.bulk_create(
+            rows, batch_size=BATCH_SIZE, ignore_conflicts=True
+        )
+        counts.update(linked_counts(name, [recipe.pk for recipe, _ in pairs]))
+        adjust_counts(Recipe._meta.get_field(name).related_model, counts)
+
+    adjust_totals(
+        user.pk,
+        added=[recipe_values(recipe) for recipe in recipes],
+        removed=previous
+    )
+
+    update_search_vector(recipe.pk for recipe in recipes)
+    bump_version(user.pk)
+    return recipes
@@ -0,0 +1,109 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+
+VERSION_KEY = "recipe:version:{user_id}"
+LIST_KEY = "recipe:list:{user_id}:{version}:{digest}"
+STATS_KEY = "recipe:stats:{name}"
+
+
+def get_cache():
+    """Return the cache backend used for recipe list responses"""
+    return caches[settings.RECIPE_CACHE_ALIAS]
+
+
+def _incr(key):
+    """Atomically increment a counter, creating it when missing"""
+    cache = get_cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The key was evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+def _new_version(key):
+    """Store and return a fresh cache version token"""
+    version = uuid.uuid4().hex
+    get_cache().set(key, version, timeout=None)
+    return version
+
+
+def get_version(user_id):
+    """Return the current cache version of a user's recipe data
+
+    Versions are random tokens rather than counters, so a version that
+    was evicted is replaced by a new one instead of restarting a count
+    and reissuing versions whose lists may still be cached.
+    """
+    cache = get_cache()
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, timeout=None):
+            # Another request stored a version first
+            version = cache.get(key, version)
+
+    return version
+
+
+def bump_version(user_id):
+    """Invalidate every cached list response of a user
+
+    The version is replaced again once the transaction commits, so a
+    list cached by a concurrent request before the commit is not served.
+    """
+    key = VERSION_KEY.format(user_id=user_id)
+    transaction.on_commit(lambda: _new_version(key))
+    return _new_version(key)
+
+
+def get_stats():
+    """Return the hit and miss counters of the list cache"""
+    cache = get_cache()
+    return {
+        name: cache.get(STATS_KEY.format(name=name), 0)
+        for name in ("hits", "misses")
+    }
+
+
+def list_cache_key(request):
+    """Return the cache key of a list response for the request user"""
+    user_id = request.user.pk
+    digest = hashlib.sha1(
+        request.build_absolute_uri().encode("utf-8")
+    ).hexdigest()
+
+    return LIST_KEY.format(
+        user_id=user_id,
+        version=get_version(user_id),
+        digest=digest
+    )
+
+
+class CachedListMixin:
+    """Serve list responses from a per user versioned cache"""
+
+    def list(self, request, *args, **kwargs):
+        cache = get_cache()
+        key = list_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            _incr(STATS_KEY.format(name="hits"))
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        _incr(STATS_KEY.format(name="misses"))
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, settings.RECIPE_CACHE_TIMEOUT)
+        response["X-Cache"] = "MISS"
+        return response
@@ -0,0 +1,87 @@
+import csv
+import io
+from itertools import chain, islice
+
+from django.conf import settings
+from django.utils.text import compress_sequence
+
+from core.models import Recipe
+from core.renderers import FastJSONRenderer
+from recipe.fastpath import row_columns, serialize_rows
+from recipe.serializers import RecipeSerializer
+
+
+RELATIONS = ("tags", "ingredients")
+CSV_FIELDS = (
+    "id", "title", "time_minutes", "price", "link", "tags", "ingredients"
+)
+
+
+def recipe_chunks(user, chunk_size=None):
+    """Yield a user's serialized recipes in lists of chunk_size
+
+    Rows are read through a server side cursor and the tags and
+    ingredients of each chunk are resolved together, so memory use does
+    not grow with the number of recipes.
+    """
+    chunk_size = chunk_size or settings.RECIPE_EXPORT_CHUNK_SIZE
+    serializer = RecipeSerializer(expand=RELATIONS)
+    rows = Recipe.objects.filter(user=user).order_by("id").values(
+        *row_columns(serializer)
+    ).iterator(chunk_size=chunk_size)
+
+    chunk = list(islice(rows, chunk_size))
+    while chunk:
+        yield serialize_rows(serializer, chunk)
+        chunk = list(islice(rows, chunk_size))
+
+
+def recipe_items(user, chunk_size=None):
+    """Yield a user's serialized recipes one at a time"""
+    return chain.from_iterable(recipe_chunks(user, chunk_size))
+
+
+def ndjson_lines(chunks):
+    """Encode chunks of recipes as newline delimited JSON"""
+    renderer = FastJSONRenderer()
+    for recipes in chunks:
+        yield b"".join(
+            renderer.render(recipe) + b"\n" for recipe in recipes
+        )
+
+
+def csv_lines(chunks):
+    """Encode chunks of recipes as CSV with related names joined by ;"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_FIELDS)
+    for recipes in chunks:
+        for recipe in recipes:
+            writer.writerow([
+                "; ".join(item["name"] for item in recipe[name])
+                if name in RELATIONS else recipe[name]
+                for name in CSV_FIELDS
+            ])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+EXPORT_FORMATS = {
+    "ndjson": (ndjson_lines, "application/x-ndjson"),
+    "csv": (csv_lines, "text/csv"),
+}
+
+
+def export_recipes(user, export_format="ndjson", compress=False,
+                   chunk_size=None):
+    """Return an iterator of a user's recipes as NDJSON or CSV bytes"""
+    encode = EXPORT_FORMATS[export_format][0]
+    content = encode(recipe_chunks(user, chunk_size))
+    if compress:
+        content = compress_sequence(content)
+
+    return content
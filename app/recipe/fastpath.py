@@ -0,0 +1,123 @@
+from collections import OrderedDict, defaultdict
+
+from rest_framework import serializers
+from rest_framework.response import Response
+
+
+# Fields whose to_representation returns database values unchanged
+PASSTHROUGH_FIELDS = (serializers.IntegerField, serializers.CharField)
+
+
+def _is_related(field):
+    return isinstance(
+        field,
+        (serializers.ManyRelatedField, serializers.ListSerializer)
+    )
+
+
+def row_columns(serializer):
+    """Return the values() columns needed to serialize a list of rows"""
+    columns = ["id"]
+    for field in serializer.fields.values():
+        if not _is_related(field) and field.source not in columns:
+            columns.append(field.source)
+
+    return columns
+
+
+def related_rows(model, name, ids, child=None):
+    """Map ids of model to their related ids, or nested rows for child
+
+    Related objects are read from the through table in a single query
+    and ordered by their id.
+    """
+    field = model._meta.get_field(name)
+    through = field.remote_field.through
+    source = field.m2m_field_name() + "_id"
+    target = field.m2m_reverse_field_name()
+
+    nested = row_columns(child) if child is not None else []
+    rows = through.objects.filter(**{source + "__in": ids}).order_by(
+        target + "_id"
+    ).values_list(
+        source,
+        target + "_id",
+        *[f"{target}__{column}" for column in nested[1:]]
+    )
+
+    grouped = defaultdict(list)
+    for row in rows:
+        if child is None:
+            grouped[row[0]].append(row[1])
+        else:
+            grouped[row[0]].append(dict(zip(nested, row[1:])))
+
+    if child is not None:
+        for key, items in grouped.items():
+            grouped[key] = serialize_rows(child, items)
+
+    return grouped
+
+
+def serialize_rows(serializer, rows):
+    """Serialize values() rows as serializer would serialize instances
+
+    Scalar fields must be model columns; many to many fields, as primary
+    keys or nested serializers, are resolved with one query per relation.
+    """
+    model = getattr(serializer.Meta, "model", None)
+    ids = [row["id"] for row in rows]
+
+    fields = []
+    for name, field in serializer.fields.items():
+        if _is_related(field):
+            child = getattr(field, "child", None)
+            related = related_rows(model, field.source, ids, child)
+            fields.append((name, "id", related.get, True))
+        elif isinstance(field, PASSTHROUGH_FIELDS):
+            fields.append((name, field.source, None, False))
+        else:
+            convert = field.to_representation
+            fields.append((name, field.source, convert, False))
+
+    data = []
+    for row in rows:
+        item = OrderedDict()
+        for name, column, convert, related in fields:
+            value = row[column]
+            if related:
+                item[name] = convert(value, [])
+            elif value is None or convert is None:
+                item[name] = value
+            else:
+                item[name] = convert(value)
+        data.append(item)
+
+    return data
+
+
+class ValuesListMixin:
+    """Build list responses from values() rows instead of model instances
+
+    The queryset ordering columns are selected too so cursor pagination
+    can read its position from the rows.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+
+        columns = row_columns(serializer)
+        for name in queryset.query.order_by:
+            name = name.lstrip("-")
+            if name not in columns:
+                columns.append(name)
+        queryset = queryset.values(*columns)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                serialize_rows(serializer, page)
+            )
+
+        return Response(serialize_rows(serializer, list(queryset)))
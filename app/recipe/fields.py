@@ -0,0 +1,83 @@
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class BatchedManyRelatedField(serializers.ManyRelatedField):
+    """Many related field resolving every submitted pk in one query
+
+    Objects already resolved for many items at once can be passed in
+    the "related_objects" context as {field name: {pk: object}}; only
+    pks missing from it are queried.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+
+        child = self.child_relation
+        pks = []
+        for item in data:
+            if isinstance(item, bool):
+                child.fail("incorrect_type", data_type=type(item).__name__)
+            try:
+                pks.append(int(item))
+            except (TypeError, ValueError):
+                child.fail("incorrect_type", data_type=type(item).__name__)
+
+        objects = self.context.get("related_objects", {}).get(
+            self.field_name, {}
+        )
+        missing = set(pks).difference(objects)
+        if missing:
+            objects = {**objects, **child.get_queryset().in_bulk(missing)}
+        for pk in pks:
+            if pk not in objects:
+                child.fail("does_not_exist", pk_value=pk)
+
+        return [objects[pk] for pk in pks]
+
+
+def resolve_related_objects(serializer, items):
+    """Resolve the pks of many items for each batched relation at once
+
+    Returns the "related_objects" context for validating the items, so
+    each relation costs one query however many items there are.
+    """
+    related_objects = {}
+    for name, field in serializer.fields.items():
+        if not isinstance(field, BatchedManyRelatedField):
+            continue
+        pks = {
+            pk for item in items if isinstance(item, dict)
+            and isinstance(item.get(name), list)
+            for pk in item[name] if type(pk) is int
+        }
+        related_objects[name] = (
+            field.child_relation.get_queryset().in_bulk(pks) if pks else {}
+        )
+
+    return related_objects
+
+
+class UserPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field limited to objects owned by the request user
+
+    With many=True all submitted pks are validated in a single
+    filter(pk__in=..., user=request.user) query.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(
+            user=self.context["request"].user
+        )
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+
+        return BatchedManyRelatedField(**list_kwargs)
@@ -0,0 +1,131 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Exists, OuterRef
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+
+
+MATCH_ANY = "any"
+MATCH_ALL = "all"
+MATCH_MODES = (MATCH_ANY, MATCH_ALL)
+
+RANGE_FILTERS = {
+    "time_minutes__gte": int,
+    "time_minutes__lte": int,
+    "price__gte": Decimal,
+    "price__lte": Decimal,
+}
+ORDERING_FIELDS = ("id", "time_minutes", "price")
+ORDERINGS = ORDERING_FIELDS + tuple("-" + name for name in ORDERING_FIELDS)
+
+
+def params_to_ints(param, value):
+    """Convert a comma separated string of IDs to a list of integers"""
+    try:
+        return [int(str_id) for str_id in value.split(",") if str_id.strip()]
+    except ValueError:
+        raise ValidationError(
+            {param: _("Expected a comma separated list of ids")}
+        )
+
+
+def param_to_number(param, value, convert):
+    """Convert a range filter value with convert, rejecting bad numbers"""
+    try:
+        number = convert(value.strip())
+    except (ValueError, InvalidOperation):
+        number = None
+    if isinstance(number, Decimal) and not number.is_finite():
+        number = None
+    if number is None:
+        raise ValidationError({param: _("Expected a number")})
+
+    return number
+
+
+def get_match_mode(query_params):
+    """Return the requested match mode for related id filters"""
+    match = query_params.get("match", MATCH_ANY)
+    if match not in MATCH_MODES:
+        raise ValidationError(
+            {"match": _("Expected one of: %s") % ", ".join(MATCH_MODES)}
+        )
+
+    return match
+
+
+def filter_by_related(queryset, field_name, ids, match=MATCH_ANY):
+    """Filter a queryset to rows linked to the given ids via EXISTS
+
+    Each condition probes the M2M through table for the outer row, so
+    rows are never duplicated and no DISTINCT is needed. With MATCH_ANY
+    a row must be linked to at least one id, with MATCH_ALL to every id.
+    """
+    field = queryset.model._meta.get_field(field_name)
+    links = field.remote_field.through.objects.filter(
+        **{field.m2m_field_name(): OuterRef("pk")}
+    )
+    target = field.m2m_reverse_field_name()
+
+    if match == MATCH_ALL:
+        for pk in sorted(set(ids)):
+            queryset = queryset.filter(Exists(links.filter(**{target: pk})))
+        return queryset
+
+    return queryset.filter(Exists(links.filter(**{f"{target}__in": ids})))
+
+
+def filter_assigned(queryset, field):
+    """Filter a queryset to rows linked by a M2M field via EXISTS
+
+    Used for the reverse side of a recipe relation, e.g. tags that are
+    assigned to at least one recipe, without joining and de-duplicating.
+    """
+    links = field.remote_field.through.objects.filter(
+        **{field.m2m_reverse_field_name(): OuterRef("pk")}
+    )
+
+    return queryset.filter(Exists(links))
+
+
+def get_ordering(query_params):
+    """Return the recipe ordering requested by ?ordering=, if any
+
+    The id breaks ties in the same direction, which keeps the ordering
+    unique for cursor pagination and matches the (user, field, id)
+    indexes on recipes.
+    """
+    value = query_params.get("ordering", "").strip()
+    if not value:
+        return None
+
+    if value not in ORDERINGS:
+        raise ValidationError(
+            {"ordering": _("Expected one of: %s") % ", ".join(ORDERINGS)}
+        )
+    if value.lstrip("-") == "id":
+        return (value,)
+
+    return (value, "-id" if value.startswith("-") else "id")
+
+
+def filter_recipes(queryset, query_params):
+    """Apply the related id, match and range params to recipes
+
+    A related id param without any ids, such as ?tags=, is ignored in
+    both match modes, the same as when it is missing.
+    """
+    match = get_match_mode(query_params)
+    for param in ("tags", "ingredients"):
+        ids = params_to_ints(param, query_params.get(param, ""))
+        if ids:
+            queryset = filter_by_related(queryset, param, ids, match)
+
+    for param, convert in RANGE_FILTERS.items():
+        value = query_params.get(param)
+        if value:
+            queryset = queryset.filter(
+                **{param: param_to_number(param, value, convert)}
+            )
+
+    return queryset
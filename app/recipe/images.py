@@ -0,0 +1,249 @@
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.validators import get_available_image_extensions
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from core.models import Recipe
+
+
+logger = logging.getLogger(__name__)
+
+UPLOADS_DIR = "uploads/recipe"
+RENDITIONS_DIR = UPLOADS_DIR + "/renditions"
+CONTENT_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+RENDITIONS = {
+    "thumbnail": (150, 150),
+    "card": (600, 600),
+    "full": (1600, 1600),
+}
+FORMATS = {
+    "webp": "WEBP",
+    "jpeg": "JPEG",
+}
+
+_executor = None
+
+
+class ImageTooLarge(ValueError):
+    """Raised when an image has more pixels than its format allows"""
+
+
+def downscale_image(image_file):
+    """Return a capped resolution copy of an image, or None if it fits
+
+    Only the header is read to check the pixel count, so oversized
+    images are rejected before any decoding. JPEGs are then decoded at
+    a reduced DCT scale (draft mode), keeping peak memory close to the
+    size of the capped image rather than the original. Other formats
+    are decoded in full, so they are held to the lower
+    IMAGE_MAX_FULL_DECODE_PIXELS. The copy is turned upright, as
+    re-encoding drops the EXIF orientation.
+    """
+    max_side = settings.IMAGE_MAX_DIMENSION
+    image = Image.open(image_file)
+    width, height = image.size
+    if image.format == "JPEG":
+        max_pixels = settings.IMAGE_MAX_PIXELS
+    else:
+        max_pixels = settings.IMAGE_MAX_FULL_DECODE_PIXELS
+    if width * height > max_pixels:
+        raise ImageTooLarge(f"Image exceeds {max_pixels} pixels.")
+    if max(width, height) <= max_side:
+        image_file.seek(0)
+        return None
+
+    image_format = image.format
+    if image_format == "JPEG":
+        image.draft("RGB", (max_side, max_side))
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    image = ImageOps.exif_transpose(image)
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffer = BytesIO()
+    image.save(
+        buffer,
+        image_format,
+        quality=settings.IMAGE_INGEST_QUALITY
+    )
+
+    return ContentFile(
+        buffer.getvalue(),
+        name=os.path.basename(getattr(image_file, "name", "") or "")
+    )
+
+
+def get_executor():
+    """Return the worker pool that renders recipe images"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_PROCESSING_WORKERS,
+            thread_name_prefix="recipe-image"
+        )
+
+    return _executor
+
+
+def rendition_path(image_name, size_name, ext):
+    """Return the storage path of a rendition of a recipe image"""
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return os.path.join(RENDITIONS_DIR, stem, f"{size_name}.{ext}")
+
+
+def rendition_stem(name):
+    """Return the image stem a rendition path belongs to, or None"""
+    if not name.startswith(RENDITIONS_DIR + "/"):
+        return None
+
+    return name[len(RENDITIONS_DIR) + 1:].split("/")[0]
+
+
+def rendition_image_names(stem):
+    """Return the names the image of a renditions stem can have
+
+    Content addressed images are stored under directories derived from
+    their digest, so the stored file gives the exact name. If it is
+    gone, every accepted image extension is a candidate. The names are
+    matched with image__in, which uses recipe_image_idx.
+    """
+    directory = UPLOADS_DIR
+    if CONTENT_DIGEST.match(stem):
+        directory = "/".join((UPLOADS_DIR, stem[:2], stem[2:4]))
+
+    try:
+        with os.scandir(default_storage.path(directory)) as entries:
+            names = [
+                f"{directory}/{entry.name}" for entry in entries
+                if os.path.splitext(entry.name)[0] == stem
+            ]
+    except FileNotFoundError:
+        names = []
+
+    return names or [
+        f"{directory}/{stem}.{ext.lower()}"
+        for ext in get_available_image_extensions()
+    ]
+
+
+def render_image(recipe_id, image_name):
+    """Build resized and re-encoded renditions of a recipe image
+
+    The image is turned upright by its EXIF orientation first, as the
+    renditions carry no EXIF. The renditions are only recorded if the
+    recipe still has the same image, so a slow worker never overwrites
+    a newer upload.
+    """
+    largest = max(max(size) for size in RENDITIONS.values())
+    with default_storage.open(image_name) as image_file:
+        image = Image.open(image_file)
+        image.draft("RGB", (largest, largest))
+        image.load()
+    image = ImageOps.exif_transpose(image).convert("RGB")
+
+    renditions = {}
+    for size_name, size in RENDITIONS.items():
+        resized = image.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+        for ext, image_format in FORMATS.items():
+            buffer = BytesIO()
+            try:
+                resized.save(
+                    buffer,
+                    image_format,
+                    quality=settings.IMAGE_RENDITION_QUALITY
+                )
+            except (KeyError, OSError):
+                # Pillow was built without support for this format
+                continue
+            renditions.setdefault(size_name, {})[ext] = default_storage.save(
+                rendition_path(image_name, size_name, ext),
+                ContentFile(buffer.getvalue())
+            )
+
+    Recipe.objects.filter(pk=recipe_id, image=image_name).update(
+        image_renditions=renditions
+    )
+    return renditions
+
+
+def _render_in_worker(recipe_id, image_name):
+    """Render an image in a worker thread and release its connection"""
+    try:
+        render_image(recipe_id, image_name)
+    except Exception:
+        logger.exception("Rendering image %s failed", image_name)
+    finally:
+        connections.close_all()
+
+
+def schedule_renditions(recipe):
+    """Render the recipe image in the worker pool once committed"""
+    recipe_id, image_name = recipe.pk, recipe.image.name
+    transaction.on_commit(
+        lambda: get_executor().submit(
+            _render_in_worker, recipe_id, image_name
+        )
+    )
+
+
+def _recently_modified(name):
+    """Return whether a stored file changed within IMAGE_RELEASE_MIN_AGE"""
+    try:
+        modified = default_storage.get_modified_time(name)
+    except FileNotFoundError:
+        return False
+
+    age = timezone.now() - modified
+    return age < timedelta(seconds=settings.IMAGE_RELEASE_MIN_AGE)
+
+
+def release_image(image_name):
+    """Delete an image and its renditions once no recipe references it
+
+    Images modified within IMAGE_RELEASE_MIN_AGE are kept, since the
+    storage touches a file reused by an identical upload whose recipe
+    may not be committed yet; gc_recipe_images collects them later.
+    Returns whether the files were deleted.
+    """
+    if not image_name or Recipe.objects.filter(image=image_name).exists():
+        return False
+    if _recently_modified(image_name):
+        return False
+
+    default_storage.delete(image_name)
+    for size_name in RENDITIONS:
+        for ext in FORMATS:
+            default_storage.delete(rendition_path(image_name, size_name, ext))
+
+    return True
+
+
+def schedule_release(image_name):
+    """Release a no longer used image once the transaction commits"""
+    if image_name:
+        transaction.on_commit(lambda: release_image(image_name))
+
+
+def rendition_urls(recipe, request=None):
+    """Return the URLs of the renditions of a recipe image"""
+    urls = {}
+    for size_name, paths in (recipe.image_renditions or {}).items():
+        urls[size_name] = {}
+        for ext, path in paths.items():
+            url = default_storage.url(path)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[size_name][ext] = url
+
+    return urls
@@ -0,0 +1,164 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse
+)
+from django.utils._os import safe_join
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+
+from core.models import Recipe
+from core.storage import is_content_addressed
+from recipe.images import rendition_image_names, rendition_stem
+from user.authentication import (
+    CachedTokenAuthentication,
+    SignedAccessTokenAuthentication
+)
+
+
+MEDIA_SERVE_DJANGO = "django"
+MEDIA_SERVE_X_ACCEL = "x-accel"
+MEDIA_SERVE_X_SENDFILE = "x-sendfile"
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+READ_SIZE = 64 * 1024
+FALLBACK_CONTENT_TYPE = "application/octet-stream"
+
+
+def user_can_read(user, path):
+    """Return whether a media path belongs to one of the user's recipes"""
+    stem = rendition_stem(path)
+    names = rendition_image_names(stem) if stem else [path]
+
+    return Recipe.objects.filter(user=user, image__in=names).exists()
+
+
+def media_content_type(path):
+    """Return the image type of a media file, or a type never rendered
+
+    Only raster image types are served as such. Anything else, SVG
+    included since it can carry scripts, is sent as opaque bytes so a
+    stored file cannot be rendered as a document.
+    """
+    content_type = mimetypes.guess_type(path)[0] or ""
+    if content_type.startswith("image/") and "svg" not in content_type:
+        return content_type
+
+    return FALLBACK_CONTENT_TYPE
+
+
+def file_etag(path, stat):
+    """Return a strong ETag for a media file"""
+    if is_content_addressed(path):
+        # The content hash in the path already identifies the bytes
+        return '"%s"' % "-".join(path.split("/")[-2:])
+    return '"%x-%x"' % (int(stat.st_mtime), stat.st_size)
+
+
+def parse_range(header, size):
+    """Return the (start, end) of a single byte range, or None"""
+    match = RANGE_RE.match(header or "")
+    if not match or not any(match.groups()):
+        return None
+
+    start, end = match.groups()
+    if not start:
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), min(int(end) if end else size - 1, size - 1)
+    if start > end:
+        return None
+
+    return start, end
+
+
+def read_range(full_path, start, end):
+    """Yield the bytes of a file between start and end inclusive"""
+    with open(full_path, "rb") as media_file:
+        media_file.seek(start)
+        remaining = end - start + 1
+        while remaining:
+            data = media_file.read(min(READ_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+class MediaView(APIView):
+    """Serve recipe media after checking the user may read it
+
+    Depending on MEDIA_SERVE_MODE the bytes are handed off to the front
+    proxy with X-Accel-Redirect (nginx) or X-Sendfile (Apache, lighttpd),
+    or streamed by a FileResponse that servers can send with sendfile.
+    """
+    authentication_classes = (
+        CachedTokenAuthentication,
+        SignedAccessTokenAuthentication,
+    )
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, path):
+        try:
+            full_path = safe_join(settings.MEDIA_ROOT, path)
+        except SuspiciousFileOperation:
+            raise Http404
+        if not path.startswith("uploads/recipe/") or \
+                not os.path.isfile(full_path):
+            raise Http404
+        if not user_can_read(request.user, path):
+            raise Http404
+
+        stat = os.stat(full_path)
+        etag = file_etag(path, stat)
+        if is_content_addressed(path):
+            cache_control = "private, max-age=31536000, immutable"
+        else:
+            cache_control = "private, max-age=3600"
+        if etag in request.META.get("HTTP_IF_NONE_MATCH", ""):
+            response = HttpResponseNotModified()
+        else:
+            response = self._file_response(request, path, full_path, stat)
+
+        response["ETag"] = etag
+        response["Cache-Control"] = cache_control
+        response["X-Content-Type-Options"] = "nosniff"
+        return response
+
+    def _file_response(self, request, path, full_path, stat):
+        content_type = media_content_type(path)
+        mode = settings.MEDIA_SERVE_MODE
+        if mode == MEDIA_SERVE_X_ACCEL:
+            response = HttpResponse(content_type=content_type)
+            response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX + path
+            return response
+        if mode == MEDIA_SERVE_X_SENDFILE:
+            response = HttpResponse(content_type=content_type)
+            response["X-Sendfile"] = full_path
+            return response
+
+        byte_range = parse_range(request.META.get("HTTP_RANGE"), stat.st_size)
+        if byte_range is None:
+            response = FileResponse(
+                open(full_path, "rb"),
+                content_type=content_type
+            )
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                read_range(full_path, start, end),
+                status=206,
+                content_type=content_type
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+            response["Content-Length"] = str(end - start + 1)
+        response["Accept-Ranges"] = "bytes"
+        return response
@@ -0,0 +1,28 @@
+from rest_framework.pagination import CursorPagination
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Keyset pagination over a user's recipes, newest first
+
+    A view can page on another key, such as the search rank, by setting
+    pagination_ordering while building its queryset.
+    """
+    ordering = ("-id",)
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, "pagination_ordering", None)
+        if ordering:
+            return ordering
+
+        return super().get_ordering(request, queryset, view)
+
+
+class RecipeAttrCursorPagination(CursorPagination):
+    """Keyset pagination over a user's tags or ingredients by name"""
+    ordering = ("-name", "-id")
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
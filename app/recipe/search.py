@@ -0,0 +1,102 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity
+)
+from django.db.models import (
+    CharField,
+    Case,
+    F,
+    FloatField,
+    IntegerField,
+    Lookup,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When
+)
+from django.db.models.functions import Cast, Coalesce
+
+from core.models import Tag, Ingredient, Recipe
+
+
+SEARCH_CONFIG = "english"
+
+
+def _names(model):
+    """Subquery of the space separated names linked to a recipe"""
+    names = model.objects.filter(recipe=OuterRef("pk")).values(
+        "recipe"
+    ).annotate(names=StringAgg("name", " ")).values("names")
+
+    return Coalesce(Subquery(names), Value(""))
+
+
+def search_vector():
+    """Return the weighted tsvector of a recipe's title and relations"""
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG) +
+        SearchVector(_names(Tag), weight="B", config=SEARCH_CONFIG) +
+        SearchVector(_names(Ingredient), weight="B", config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vector(recipe_ids):
+    """Recompute the search vector of the given recipes in one UPDATE"""
+    recipe_ids = list(recipe_ids)
+    if recipe_ids:
+        Recipe.objects.filter(pk__in=recipe_ids).update(
+            search_vector=search_vector()
+        )
+
+
+def search_recipes(queryset, value):
+    """Filter recipes matching a search string, annotated with a rank"""
+    query = SearchQuery(value, config=SEARCH_CONFIG)
+
+    # ts_rank returns a real; compared against the cursor's double the
+    # boundary row would match again, so the rank is paged as a double
+    return queryset.filter(search_vector=query).annotate(
+        rank=Cast(SearchRank(F("search_vector"), query), FloatField())
+    )
+
+
+@CharField.register_lookup
+class IPrefix(Lookup):
+    """Case insensitive prefix match compiled to ILIKE
+
+    Unlike istartswith, which compares UPPER() values, a plain ILIKE
+    can be answered from a pg_trgm GIN index on the column.
+    """
+    lookup_name = "iprefix"
+    prepare_rhs = False
+
+    def get_db_prep_lookup(self, value, connection):
+        value = connection.ops.prep_for_like_query(value) + "%"
+        return "%s", [value]
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} ILIKE {rhs}", lhs_params + rhs_params
+
+
+def typeahead(queryset, value, limit):
+    """Return the top names matching a prefix or similar to a value
+
+    Both conditions are served by the trigram index on name; prefix
+    matches are ranked above fuzzy ones, then by similarity.
+    """
+    return queryset.filter(
+        Q(name__iprefix=value) | Q(name__trigram_similar=value)
+    ).annotate(
+        is_prefix=Case(
+            When(name__iprefix=value, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField()
+        ),
+        similarity=TrigramSimilarity("name", value)
+    ).order_by("-is_prefix", "-similarity", "name", "id")[:limit]
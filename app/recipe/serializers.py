@@ -1,8 +1,55 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files import File
+from django.core.validators import validate_image_file_extension
 from rest_framework import serializers
-from core.models import Tag, Ingredient, Recipe
+from core.models import Tag, Ingredient, Recipe, RecipeStats
+from recipe.fields import UserPrimaryKeyRelatedField
+from recipe.images import rendition_urls, downscale_image, ImageTooLarge
 
 
-class TagSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """Serializer mixin taking a fields argument to limit its output"""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class RecipeAttrSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Base serializer for user owned recipe attributes"""
+
+    def validate_name(self, value):
+        """Check the user does not already have an object with the name"""
+        request = self.context.get("request")
+        queryset = self.Meta.model.objects.filter(
+            user=request.user,
+            name=value
+        )
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+        if queryset.exists():
+            raise serializers.ValidationError(
+                "An object with this name already exists."
+            )
+
+        return value
+
+
+class NameListSerializer(serializers.Serializer):
+    """Serializer for a list of tag or ingredient names"""
+
+    names = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        allow_empty=False,
+        max_length=1000
+    )
+
+
+class TagSerializer(RecipeAttrSerializer):
     """Serializer for tag objects"""
 
     class Meta:
@@ -11,7 +58,7 @@ class TagSerializer(serializers.ModelSerializer):
         read_only = ("id",)
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(RecipeAttrSerializer):
     """Serializer for Ingredient objects"""
 
     class Meta:
@@ -20,19 +67,35 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only = ("id",)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serialize a recipe"""
 
-    ingredients = serializers.PrimaryKeyRelatedField(
+    ingredients = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredient.objects.all()
     )
 
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
 
+    expandable_fields = {
+        "ingredients": IngredientSerializer,
+        "tags": TagSerializer,
+    }
+
+    def __init__(self, *args, **kwargs):
+        expand = kwargs.pop("expand", ())
+        super().__init__(*args, **kwargs)
+
+        for name in expand:
+            if name in self.fields:
+                self.fields[name] = self.expandable_fields[name](
+                    many=True,
+                    read_only=True
+                )
+
     class Meta:
         model = Recipe
         fields = (
@@ -42,16 +105,94 @@ class RecipeSerializer(serializers.ModelSerializer):
         read_only_fields = ("id",)
 
 
-class RecipeDetailSerializer(RecipeSerializer):
+class RenditionsMixin(serializers.Serializer):
+    """Expose the URLs of the resized renditions of a recipe image"""
+    renditions = serializers.SerializerMethodField()
+
+    def get_renditions(self, obj):
+        return rendition_urls(obj, self.context.get("request"))
+
+
+class RecipeDetailSerializer(RenditionsMixin, RecipeSerializer):
     """Serialize a detail recipe"""
     ingredients = IngredientSerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
 
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ("image", "renditions")
+        read_only_fields = ("id", "image")
+
 
-class RecipeImageSerializer(serializers.ModelSerializer):
+class RecipeImageSerializer(RenditionsMixin, serializers.ModelSerializer):
     """Serializer for uploading images to recipes"""
 
     class Meta:
         model = Recipe
-        fields = ("id", "image")
+        fields = ("id", "image", "renditions")
         read_only_fields = ("id",)
+
+    def validate_image(self, value):
+        """Reject oversized images and cap the stored resolution"""
+        try:
+            return downscale_image(value) or value
+        except ImageTooLarge as exc:
+            raise serializers.ValidationError(str(exc))
+
+
+class ImageUploadSerializer(serializers.Serializer):
+    """Serializer for initiating a chunked image upload"""
+
+    filename = serializers.CharField(max_length=100)
+
+    def validate_filename(self, value):
+        """Only accept a plain file name with an image extension
+
+        The extension becomes part of the stored path, which the media
+        view serves with a content type guessed from it.
+        """
+        if "/" in value or "\\" in value or value.startswith("."):
+            raise serializers.ValidationError("Invalid file name.")
+        try:
+            validate_image_file_extension(File(None, name=value))
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.messages)
+
+        return value
+
+
+class RecipeStatsSerializer(serializers.ModelSerializer):
+    """Serialize a user's recipe stats with per tag/ingredient counts"""
+    price_avg = serializers.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        read_only=True
+    )
+    time_avg = serializers.FloatField(read_only=True)
+    tags = serializers.SerializerMethodField()
+    ingredients = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RecipeStats
+        fields = (
+            "recipe_count", "price_total", "price_avg", "price_min",
+            "price_max", "time_total", "time_avg", "time_min", "time_max",
+            "tags", "ingredients"
+        )
+        read_only_fields = fields
+
+    def get_tags(self, obj):
+        return self._recipe_counts(Tag, obj)
+
+    def get_ingredients(self, obj):
+        return self._recipe_counts(Ingredient, obj)
+
+    def _recipe_counts(self, model, obj):
+        """Return the used tags or ingredients with their recipe counts"""
+        return list(
+            model.objects.filter(
+                user_id=obj.user_id,
+                recipe_count__gt=0
+            ).order_by("-recipe_count", "name").values(
+                "id", "name", "recipe_count"
+            )
+        )
@@ -0,0 +1,179 @@
+from django.db.models.signals import (
+    pre_save,
+    post_save,
+    pre_delete,
+    post_delete,
+    m2m_changed
+)
+from django.dispatch import receiver
+
+from core.models import Tag, Ingredient, Recipe
+from recipe import stats
+from recipe.cache import bump_version
+from recipe.images import schedule_release
+from recipe.search import update_search_vector
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+def invalidate_user_lists(sender, instance, **kwargs):
+    """Invalidate the cached lists of the owner of a changed object"""
+    bump_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_user_lists_on_m2m(sender, instance, action, **kwargs):
+    """Invalidate cached lists when recipe tags or ingredients change"""
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_version(instance.user_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def release_recipe_image(sender, instance, **kwargs):
+    """Reclaim the image of a deleted recipe if nothing else uses it"""
+    schedule_release(instance.image.name)
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, update_fields=None, **kwargs):
+    """Refresh the search vector of a recipe when its title may change"""
+    if update_fields is None or "title" in update_fields:
+        update_search_vector([instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def index_recipe_relations(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    """Refresh search vectors when recipe tags or ingredients change"""
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            update_search_vector([instance.pk])
+    elif action == "pre_clear":
+        instance._cleared_recipe_ids = list(
+            instance.recipe_set.values_list("pk", flat=True)
+        )
+    elif action == "post_clear":
+        update_search_vector(getattr(instance, "_cleared_recipe_ids", []))
+    elif action in ("post_add", "post_remove"):
+        update_search_vector(pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def index_renamed_name(sender, instance, created, **kwargs):
+    """Refresh the recipes using a tag or ingredient after a rename"""
+    if not created:
+        update_search_vector(
+            instance.recipe_set.values_list("pk", flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def collect_recipes_to_index(sender, instance, **kwargs):
+    """Remember the recipes of a tag or ingredient being deleted"""
+    instance._indexed_recipe_ids = list(
+        instance.recipe_set.values_list("pk", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def index_deleted_name(sender, instance, **kwargs):
+    """Refresh the recipes that used a deleted tag or ingredient"""
+    update_search_vector(getattr(instance, "_indexed_recipe_ids", []))
+
+
+@receiver(pre_save, sender=Recipe)
+def collect_recipe_stats(sender, instance, update_fields=None, **kwargs):
+    """Remember the stored values of a recipe about to be updated"""
+    instance._stats_values = None
+    if instance._state.adding:
+        return
+    if update_fields is not None and not (
+        {"price", "time_minutes"} & set(update_fields)
+    ):
+        return
+
+    instance._stats_values = Recipe.objects.filter(
+        pk=instance.pk
+    ).values_list("price", "time_minutes").first()
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_stats(sender, instance, created, **kwargs):
+    """Add a new or changed recipe to its owner's stats"""
+    values = stats.recipe_values(instance)
+    if created:
+        stats.adjust_totals(instance.user_id, added=[values])
+        return
+
+    previous = getattr(instance, "_stats_values", None)
+    if previous is not None and tuple(previous) != values:
+        stats.adjust_totals(
+            instance.user_id,
+            added=[values],
+            removed=[previous]
+        )
+
+
+@receiver(pre_delete, sender=Recipe)
+def uncount_recipe_relations(sender, instance, **kwargs):
+    """Drop a deleted recipe from its tag and ingredient counts"""
+    for name, model in stats.RELATIONS.items():
+        counts = stats.linked_counts(name, [instance.pk])
+        stats.adjust_counts(
+            model,
+            {pk: -count for pk, count in counts.items()}
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_recipe_stats(sender, instance, **kwargs):
+    """Remove a deleted recipe from its owner's stats"""
+    stats.adjust_totals(
+        instance.user_id,
+        removed=[stats.recipe_values(instance)]
+    )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def count_recipe_relations(sender, instance, action, reverse, model,
+                           pk_set, **kwargs):
+    """Keep tag and ingredient recipe counts in step with their links
+
+    Added links are counted after the add, which only reports new ones;
+    removed links are looked up before they are deleted.
+    """
+    if action not in ("post_add", "pre_remove", "pre_clear"):
+        return
+
+    name = "tags" if sender is Recipe.tags.through else "ingredients"
+    related = stats.RELATIONS[name]
+    if action == "post_add":
+        if reverse:
+            deltas = {instance.pk: len(pk_set)}
+        else:
+            deltas = dict.fromkeys(pk_set, 1)
+        stats.adjust_counts(related, deltas)
+        return
+
+    if reverse:
+        recipes = instance.recipe_set.all()
+        if pk_set is not None:
+            recipes = recipes.filter(pk__in=pk_set)
+        deltas = {instance.pk: -recipes.count()}
+    else:
+        counts = stats.linked_counts(name, [instance.pk])
+        deltas = {
+            pk: -count for pk, count in counts.items()
+            if pk_set is None or pk in pk_set
+        }
+    stats.adjust_counts(related, deltas)
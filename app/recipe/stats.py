@@ -0,0 +1,141 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from core.models import Tag, Ingredient, Recipe, RecipeStats
+
+
+RELATIONS = {"tags": Tag, "ingredients": Ingredient}
+
+
+def recipe_values(recipe):
+    """Return the (price, time_minutes) a recipe contributes to stats"""
+    return (
+        Recipe._meta.get_field("price").to_python(recipe.price),
+        int(recipe.time_minutes)
+    )
+
+
+def adjust_totals(user_id, added=(), removed=()):
+    """Apply recipes added and removed to a user's running totals
+
+    Recipes are given as (price, time_minutes) pairs; an update is the
+    old values removed and the new ones added. Minimums and maximums are
+    widened in place and only recomputed when a removed value was one.
+    """
+    added, removed = list(added), list(removed)
+    if not added and not removed:
+        return
+
+    stats = RecipeStats.objects.filter(user_id=user_id).first()
+    if stats is None:
+        if not added:
+            return
+        stats, _ = RecipeStats.objects.get_or_create(user_id=user_id)
+
+    updates = {
+        "recipe_count": F("recipe_count") + len(added) - len(removed),
+        "price_total": F("price_total")
+        + sum(price for price, _ in added)
+        - sum(price for price, _ in removed),
+        "time_total": F("time_total")
+        + sum(time for _, time in added)
+        - sum(time for _, time in removed),
+    }
+    if added:
+        prices = [price for price, _ in added]
+        times = [time for _, time in added]
+        updates.update(
+            price_min=Least("price_min", min(prices)),
+            price_max=Greatest("price_max", max(prices)),
+            time_min=Least("time_min", min(times)),
+            time_max=Greatest("time_max", max(times)),
+        )
+    RecipeStats.objects.filter(user_id=user_id).update(**updates)
+
+    if any(
+        price in (stats.price_min, stats.price_max)
+        or time in (stats.time_min, stats.time_max)
+        for price, time in removed
+    ):
+        refresh_extremes(user_id)
+
+
+def refresh_extremes(user_id):
+    """Recompute the minimum and maximum values of a user's recipes"""
+    RecipeStats.objects.filter(user_id=user_id).update(
+        **Recipe.objects.filter(user_id=user_id).aggregate(
+            price_min=Min("price"),
+            price_max=Max("price"),
+            time_min=Min("time_minutes"),
+            time_max=Max("time_minutes"),
+        )
+    )
+
+
+def adjust_counts(model, deltas):
+    """Add {pk: change} deltas to the recipe counts of tags or ingredients"""
+    grouped = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            grouped[delta].append(pk)
+
+    for delta, pks in grouped.items():
+        model.objects.filter(pk__in=pks).update(
+            recipe_count=F("recipe_count") + delta
+        )
+
+
+def linked_counts(name, recipe_ids):
+    """Count the links of recipes to each of their tags or ingredients"""
+    field = Recipe._meta.get_field(name)
+    source = field.m2m_field_name() + "_id"
+    target = field.m2m_reverse_field_name() + "_id"
+
+    return Counter(
+        field.remote_field.through.objects.filter(
+            **{source + "__in": recipe_ids}
+        ).values_list(target, flat=True)
+    )
+
+
+@transaction.atomic
+def rebuild_stats(user_ids=None):
+    """Recompute recipe stats from scratch, for some or all users"""
+    recipes = Recipe.objects.all()
+    if user_ids is not None:
+        recipes = recipes.filter(user_id__in=user_ids)
+
+    stats = [
+        RecipeStats(user_id=row.pop("user_id"), **row)
+        for row in recipes.order_by().values("user_id").annotate(
+            recipe_count=Count("id"),
+            price_total=Sum("price"),
+            price_min=Min("price"),
+            price_max=Max("price"),
+            time_total=Sum("time_minutes"),
+            time_min=Min("time_minutes"),
+            time_max=Max("time_minutes"),
+        )
+    ]
+    existing = RecipeStats.objects.all()
+    if user_ids is not None:
+        existing = existing.filter(user_id__in=user_ids)
+    existing.delete()
+    RecipeStats.objects.bulk_create(stats)
+
+    for name, model in RELATIONS.items():
+        field = Recipe._meta.get_field(name)
+        target = field.m2m_reverse_field_name() + "_id"
+        links = field.remote_field.through.objects.filter(
+            **{target: OuterRef("pk")}
+        ).order_by().values(target).annotate(count=Count("*"))
+
+        objects = model.objects.all()
+        if user_ids is not None:
+            objects = objects.filter(user_id__in=user_ids)
+        objects.update(
+            recipe_count=Coalesce(Subquery(links.values("count")), 0)
+        )
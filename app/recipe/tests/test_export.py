@@ -0,0 +1,117 @@
+import csv
+import gzip
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+EXPORT_URL = reverse("recipe:recipe-export")
+
+
+class RecipeExportTests(TestCase):
+    """Test streaming exports of a user's recipes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@outlook.com",
+            "test123"
+        )
+        self.client.force_authenticate(self.user)
+
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        ingredient = Ingredient.objects.create(user=self.user, name="Kale")
+        for i in range(5):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f"Recipe {i}",
+                time_minutes=i,
+                price=1.5
+            )
+            recipe.tags.add(tag)
+            recipe.ingredients.add(ingredient)
+
+        other = get_user_model().objects.create_user(
+            "other@outlook.com",
+            "test123"
+        )
+        Recipe.objects.create(
+            user=other,
+            title="Not mine",
+            time_minutes=1,
+            price=1
+        )
+
+    def test_export_ndjson(self):
+        """Test recipes are streamed one JSON object per line"""
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        lines = b"".join(res.streaming_content).splitlines()
+        recipes = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [recipe["title"] for recipe in recipes],
+            [f"Recipe {i}" for i in range(5)]
+        )
+        self.assertEqual(recipes[0]["tags"][0]["name"], "Vegan")
+        self.assertEqual(recipes[0]["price"], "1.50")
+
+    def test_export_csv(self):
+        """Test recipes are streamed as CSV with related names"""
+        res = self.client.get(EXPORT_URL, {"type": "csv"})
+
+        self.assertEqual(res["Content-Type"], "text/csv")
+        content = b"".join(res.streaming_content).decode("utf-8")
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]["tags"], "Vegan")
+        self.assertEqual(rows[0]["ingredients"], "Kale")
+
+    def test_export_json(self):
+        """Test recipes are streamed as a single JSON array"""
+        res = self.client.get(
+            EXPORT_URL,
+            {"type": "json"},
+            HTTP_ACCEPT_ENCODING="gzip"
+        )
+
+        self.assertEqual(res["Content-Type"], "application/json")
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        recipes = json.loads(gzip.decompress(b"".join(res.streaming_content)))
+        self.assertEqual(
+            [recipe["title"] for recipe in recipes],
+            [f"Recipe {i}" for i in range(5)]
+        )
+        self.assertEqual(recipes[0]["ingredients"][0]["name"], "Kale")
+
+    def test_export_gzip(self):
+        """Test the export is gzipped when the client accepts it"""
+        res = self.client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        content = gzip.decompress(b"".join(res.streaming_content))
+        self.assertEqual(len(content.splitlines()), 5)
+
+    def test_export_resolves_relations_per_chunk(self):
+        """Test each chunk of recipes loads its relations together"""
+        with self.settings(RECIPE_EXPORT_CHUNK_SIZE=2):
+            res = self.client.get(EXPORT_URL)
+            # One cursor over the recipes, tags and ingredients per chunk
+            with self.assertNumQueries(1 + 2 * 3):
+                content = b"".join(res.streaming_content)
+
+        self.assertEqual(len(content.splitlines()), 5)
+
+    def test_export_invalid_type(self):
+        """Test an unknown export type returns 400"""
+        res = self.client.get(EXPORT_URL, {"type": "xml"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.fastpath import row_columns, serialize_rows
+from recipe.serializers import (
+    RecipeSerializer, TagSerializer, IngredientSerializer
+)
+
+
+def render(data):
+    """Return the JSON bytes of serialized data"""
+    return JSONRenderer().render(data)
+
+
+class ValuesSerializationTests(TestCase):
+    """Test rows serialize identically to model instances"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@gmail.com",
+            "testpass"
+        )
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ("Vegan", "Dinner", "Quick")
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ("Salt", "Kale")
+        ]
+
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title="Kale salad",
+            time_minutes=5,
+            price=4.5,
+            link="https://example.com/kale"
+        )
+        recipe.tags.add(*tags)
+        recipe.ingredients.add(*ingredients)
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title="Plain toast",
+            time_minutes=2,
+            price=0.99
+        )
+        recipe.tags.add(tags[2])
+
+    def assertParity(self, serializer_class, queryset, **kwargs):
+        serializer = serializer_class(**kwargs)
+        rows = list(queryset.values(*row_columns(serializer)))
+        expected = serializer_class(queryset, many=True, **kwargs).data
+
+        self.assertEqual(
+            render(serialize_rows(serializer, rows)),
+            render(expected)
+        )
+
+    def recipes(self):
+        """Return recipes with relations in the order rows use"""
+        return Recipe.objects.order_by("id").prefetch_related(
+            Prefetch("tags", queryset=Tag.objects.order_by("id")),
+            Prefetch("ingredients", queryset=Ingredient.objects.order_by("id"))
+        )
+
+    def test_recipe_rows_match_serializer(self):
+        """Test recipe rows render the same bytes as RecipeSerializer"""
+        self.assertParity(RecipeSerializer, self.recipes())
+
+    def test_expanded_recipe_rows_match_serializer(self):
+        """Test nested tags and ingredients render the same bytes"""
+        self.assertParity(
+            RecipeSerializer,
+            self.recipes(),
+            expand=["tags", "ingredients"]
+        )
+
+    def test_sparse_recipe_rows_match_serializer(self):
+        """Test rows limited to some fields render the same bytes"""
+        self.assertParity(
+            RecipeSerializer,
+            self.recipes(),
+            fields=["title", "price", "tags"]
+        )
+
+    def test_tag_and_ingredient_rows_match_serializer(self):
+        """Test tag and ingredient rows render the same bytes"""
+        self.assertParity(TagSerializer, Tag.objects.order_by("-name"))
+        self.assertParity(
+            IngredientSerializer,
+            Ingredient.objects.order_by("-name")
+        )
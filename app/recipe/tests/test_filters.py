@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase
+
+from core.models import Recipe, Tag
+from recipe import filters
+
+
+class RecipeRangeIndexTests(TestCase):
+    """Test range filters and orderings are served by recipe indexes"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@outlook.com",
+            "test123"
+        )
+        self.tag = Tag.objects.create(user=self.user, name="Vegan")
+        # The tables are tiny, so steer the planner away from seq scans
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def plan(self, params):
+        """Return the query plan of the recipe list for query params"""
+        query_params = QueryDict(params)
+        queryset = filters.filter_recipes(
+            Recipe.objects.filter(user=self.user),
+            query_params
+        )
+        ordering = filters.get_ordering(query_params) or ("-id",)
+
+        return queryset.order_by(*ordering).explain()
+
+    def test_time_range_uses_index(self):
+        """Test a cooking time range scans the (user, time) index"""
+        self.assertIn(
+            "recipe_user_time_id_idx",
+            self.plan("time_minutes__lte=30&ordering=time_minutes")
+        )
+
+    def test_price_range_uses_index(self):
+        """Test a price range scans the (user, price) index"""
+        self.assertIn(
+            "recipe_user_price_id_idx",
+            self.plan("price__gte=2&price__lte=10&ordering=-price")
+        )
+
+    def test_price_ordering_with_tags_uses_index(self):
+        """Test ordering tag filtered recipes by price reads the index"""
+        plan = self.plan(f"tags={self.tag.id}&ordering=price")
+
+        self.assertIn("recipe_user_price_id_idx", plan)
+        self.assertNotIn("Sort", plan)
@@ -44,7 +44,7 @@ class PrivateIngredientsApiTests(TestCase):
         ingredients = Ingredient.objects.all().order_by("-name")
         serializer = IngredientSerializer(ingredients, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """Test that ingredients for authenticated user are returned"""
@@ -59,8 +59,8 @@ class PrivateIngredientsApiTests(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]["name"], ingredient.name)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["name"], ingredient.name)
 
     def test_create_ingredient_successful(self):
         """Test create a new ingredient success"""
@@ -102,8 +102,8 @@ class PrivateIngredientsApiTests(TestCase):
 
         serializer_1 = IngredientSerializer(ingredient_1)
         serializer_2 = IngredientSerializer(ingredient_2)
-        self.assertIn(serializer_1.data, res.data)
-        self.assertNotIn(serializer_2.data, res.data)
+        self.assertIn(serializer_1.data, res.data["results"])
+        self.assertNotIn(serializer_2.data, res.data["results"])
 
     def test_retrieve_ingredients_assigned_unique(self):
         """Test filtering ingredients by assinged returns unique items"""
@@ -126,4 +126,36 @@ class PrivateIngredientsApiTests(TestCase):
 
         res = self.client.get(INGREDIENTS_URL, {"assigned_only": 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_typeahead_ingredients(self):
+        """Test ?q= returns prefix matches first, then fuzzy matches"""
+        for name in ("Potato", "Tomatillo", "Basil", "Tomato"):
+            Ingredient.objects.create(user=self.user, name=name)
+        Ingredient.objects.create(
+            user=get_user_model().objects.create_user(
+                "user2@outlook.com",
+                "test321"
+            ),
+            name="Tomato puree"
+        )
+
+        res_prefix = self.client.get(INGREDIENTS_URL, {"q": "toma"})
+        res_fuzzy = self.client.get(INGREDIENTS_URL, {"q": "tomatoe"})
+        res_limit = self.client.get(INGREDIENTS_URL, {"q": "toma", "limit": 1})
+
+        self.assertEqual(
+            [item["name"] for item in res_prefix.data],
+            ["Tomato", "Tomatillo"]
+        )
+        self.assertEqual(res_fuzzy.data[0]["name"], "Tomato")
+        self.assertNotIn("Basil", [item["name"] for item in res_fuzzy.data])
+        self.assertEqual(len(res_limit.data), 1)
+
+    def test_typeahead_escapes_wildcards(self):
+        """Test LIKE wildcards in ?q= are matched literally"""
+        Ingredient.objects.create(user=self.user, name="Salt")
+
+        res = self.client.get(INGREDIENTS_URL, {"q": "%"})
+
+        self.assertEqual(res.data, [])
@@ -0,0 +1,97 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Tag, Recipe
+from recipe import cache as list_cache
+
+TAGS_URL = reverse("recipe:tag-list")
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+class ListCacheTests(TestCase):
+    """Test the per user versioned list response cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "test@outlook.com",
+            "test123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_list_served_from_cache(self):
+        """Test a repeated list request does not hit the database"""
+        Tag.objects.create(user=self.user, name="Vegan")
+        res_1 = self.client.get(TAGS_URL)
+
+        with self.assertNumQueries(0):
+            res_2 = self.client.get(TAGS_URL)
+
+        self.assertEqual(res_1["X-Cache"], "MISS")
+        self.assertEqual(res_2["X-Cache"], "HIT")
+        self.assertEqual(res_1.data, res_2.data)
+        self.assertEqual(list_cache.get_stats(), {"hits": 1, "misses": 1})
+
+    def test_query_params_cached_separately(self):
+        """Test different query params get their own cache entry"""
+        self.client.get(TAGS_URL)
+        res = self.client.get(TAGS_URL, {"assigned_only": 1})
+
+        self.assertEqual(res["X-Cache"], "MISS")
+
+    def test_create_invalidates_list(self):
+        """Test creating an object invalidates the owner's lists"""
+        self.client.get(TAGS_URL)
+        Tag.objects.create(user=self.user, name="Vegan")
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_m2m_change_invalidates_list(self):
+        """Test changing recipe tags invalidates the owner's lists"""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title="Curry",
+            time_minutes=10,
+            price=5.00
+        )
+        self.client.get(RECIPES_URL)
+        recipe.tags.add(tag)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["results"][0]["tags"], [tag.id])
+
+    def test_other_users_changes_do_not_invalidate(self):
+        """Test another user's writes leave the cached list in place"""
+        user_two = get_user_model().objects.create_user(
+            "user2@outlook.com",
+            "test321"
+        )
+        self.client.get(TAGS_URL)
+        Tag.objects.create(user=user_two, name="Fruit")
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res["X-Cache"], "HIT")
+
+    def test_evicted_version_is_not_reissued(self):
+        """Test a lost version never brings back lists cached before"""
+        self.client.get(TAGS_URL)
+        Tag.objects.create(user=self.user, name="Vegan")
+        self.client.get(TAGS_URL)
+        Tag.objects.create(user=self.user, name="Fruit")
+        cache.delete(list_cache.VERSION_KEY.format(user_id=self.user.pk))
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(len(res.data["results"]), 2)
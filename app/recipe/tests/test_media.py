@@ -0,0 +1,151 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+
+IMAGE_NAME = "uploads/recipe/aa/aa/" + "a" * 64 + ".jpg"
+IMAGE_CONTENT = b"0123456789"
+
+
+def media_url(path):
+    """Return the URL serving a media file"""
+    return reverse("media", args=[path])
+
+
+class MediaViewTests(TestCase):
+    """Test serving recipe media"""
+
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root.name
+        )
+        self.settings_override.enable()
+
+        path = default_storage.path(IMAGE_NAME)
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as image_file:
+            image_file.write(IMAGE_CONTENT)
+
+        self.user = get_user_model().objects.create_user(
+            "test@outlook.com",
+            "test123"
+        )
+        Recipe.objects.create(
+            user=self.user,
+            title="Curry",
+            time_minutes=10,
+            price=5.00,
+            image=IMAGE_NAME
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.media_root.cleanup()
+
+    def test_serve_image(self):
+        """Test the owner receives the file with caching headers"""
+        res = self.client.get(media_url(IMAGE_NAME))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(res.streaming_content), IMAGE_CONTENT)
+        self.assertIn("immutable", res["Cache-Control"])
+        self.assertIn("a" * 64, res["ETag"])
+        self.assertEqual(res["Content-Type"], "image/jpeg")
+        self.assertEqual(res["X-Content-Type-Options"], "nosniff")
+
+    def test_serve_non_image_as_opaque_bytes(self):
+        """Test files without a raster image type are not served as such"""
+        for ext in ("html", "svg"):
+            name = f"uploads/recipe/{'b' * 32}.{ext}"
+            with open(default_storage.path(name), "wb") as media_file:
+                media_file.write(b"<script></script>")
+            Recipe.objects.filter(user=self.user).update(image=name)
+
+            res = self.client.get(media_url(name))
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res["Content-Type"], "application/octet-stream")
+            self.assertEqual(res["X-Content-Type-Options"], "nosniff")
+
+    def test_serve_image_not_modified(self):
+        """Test a matching If-None-Match returns 304"""
+        etag = self.client.get(media_url(IMAGE_NAME))["ETag"]
+
+        res = self.client.get(media_url(IMAGE_NAME), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_serve_image_range(self):
+        """Test a byte range request returns partial content"""
+        res = self.client.get(media_url(IMAGE_NAME), HTTP_RANGE="bytes=2-4")
+
+        self.assertEqual(res.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b"".join(res.streaming_content), b"234")
+        self.assertEqual(res["Content-Range"], "bytes 2-4/10")
+
+    @override_settings(MEDIA_SERVE_MODE="x-accel")
+    def test_serve_image_x_accel(self):
+        """Test the file is handed off to the proxy in x-accel mode"""
+        res = self.client.get(media_url(IMAGE_NAME))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res["X-Accel-Redirect"],
+            "/protected-media/" + IMAGE_NAME
+        )
+        self.assertEqual(res.content, b"")
+
+    def test_other_users_image_not_found(self):
+        """Test users cannot read another user's images"""
+        user_two = get_user_model().objects.create_user(
+            "user2@outlook.com",
+            "test321"
+        )
+        self.client.force_authenticate(user_two)
+
+        res = self.client.get(media_url(IMAGE_NAME))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_serve_rendition_by_image_name(self):
+        """Test renditions are authorized by an indexed image lookup"""
+        name = f"uploads/recipe/renditions/{'a' * 64}/thumbnail.jpeg"
+        path = default_storage.path(name)
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as image_file:
+            image_file.write(IMAGE_CONTENT)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(media_url(name))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        lookup = ctx.captured_queries[-1]["sql"]
+        self.assertIn(f"IN ('{IMAGE_NAME}')", lookup)
+        self.assertNotIn("~", lookup)
+
+    def test_path_traversal_not_found(self):
+        """Test paths outside the media root are rejected"""
+        res = self.client.get(media_url("uploads/recipe/../../etc/passwd"))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_auth_required(self):
+        """Test authentication is required to read media"""
+        self.client.force_authenticate(None)
+
+        res = self.client.get(media_url(IMAGE_NAME))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
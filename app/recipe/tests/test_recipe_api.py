@@ -1,17 +1,24 @@
 import tempfile
 import os
+from io import BytesIO
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from django.urls import reverse
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 
 from PIL import Image
-from core.models import Recipe, Tag, Ingredient
+from core.models import Recipe, RecipeImageUpload, Tag, Ingredient
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe import uploads
+from recipe.images import render_image, release_image
 
 RECIPES_URL = reverse("recipe:recipe-list")
+BULK_RECIPES_URL = reverse("recipe:recipe-bulk")
 
 
 def image_upload_url(recipe_id):
@@ -19,11 +26,42 @@ def image_upload_url(recipe_id):
     return reverse("recipe:recipe-upload-image", args=[recipe_id])
 
 
+def image_uploads_url(recipe_id):
+    """Return URL for starting a chunked recipe image upload"""
+    return reverse("recipe:recipe-start-image-upload", args=[recipe_id])
+
+
+def image_upload_chunk_url(recipe_id, upload_id):
+    """Return URL for appending to a chunked recipe image upload"""
+    return reverse(
+        "recipe:recipe-image-upload-chunk",
+        args=[recipe_id, upload_id]
+    )
+
+
+def image_upload_finalize_url(recipe_id, upload_id):
+    """Return URL for finalizing a chunked recipe image upload"""
+    return reverse(
+        "recipe:recipe-image-upload-finalize",
+        args=[recipe_id, upload_id]
+    )
+
+
 def detail_url(recipe_id):
     """Return recipe detail URL"""
     return reverse("recipe:recipe-detail", args=[recipe_id])
 
 
+def rotated_jpeg(size):
+    """Return a JPEG stored sideways, with an EXIF orientation of 6"""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buffer = BytesIO()
+    Image.new("RGB", size).save(buffer, format="JPEG", exif=exif)
+    buffer.seek(0)
+    return buffer
+
+
 def sample_tag(user, name="Starter"):
     """Create and return a sample tag"""
     return Tag.objects.create(user=user, name=name)
@@ -81,7 +119,7 @@ class PrivateRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_recipes_limited_to_user(self):
         """Test retireving recipes for user"""
@@ -98,8 +136,309 @@ class PrivateRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"], serializer.data)
+
+    def test_list_recipes_query_count_is_constant(self):
+        """Test listing recipes runs the same queries for any result size"""
+        for i in range(10):
+            recipe = sample_recipe(user=self.user, title=f"Recipe {i}")
+            recipe.tags.add(sample_tag(user=self.user, name=f"Tag {i}"))
+            recipe.ingredients.add(
+                sample_ingredient(user=self.user, name=f"Ingredient {i}")
+            )
+
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 10)
+
+    def test_list_recipes_paginated_by_cursor(self):
+        """Test recipes are returned newest first in cursor pages"""
+        recipes = [
+            sample_recipe(user=self.user, title=f"Recipe {i}")
+            for i in range(5)
+        ]
+
+        res = self.client.get(RECIPES_URL, {"page_size": 2})
+        ids = [item["id"] for item in res.data["results"]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            ids.extend(item["id"] for item in res.data["results"])
+
+        self.assertEqual(ids, [recipe.id for recipe in reversed(recipes)])
+
+    def test_list_recipes_sparse_fields(self):
+        """Test ?fields= limits the list output and the queries run"""
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(sample_tag(user=self.user))
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(RECIPES_URL, {"fields": "id,title"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"],
+            [{"id": recipe.id, "title": recipe.title}]
+        )
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('"price"', ctx.captured_queries[0]["sql"])
+
+    def test_view_recipe_detail_sparse_fields(self):
+        """Test ?fields= limits the detail output to the given fields"""
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(sample_tag(user=self.user))
+
+        with self.assertNumQueries(2):
+            res = self.client.get(
+                detail_url(recipe.id),
+                {"fields": "title,tags"}
+            )
+
+        self.assertEqual(set(res.data), {"title", "tags"})
+        self.assertEqual(res.data["tags"][0]["name"], "Starter")
+
+    def test_sparse_fields_unknown_field(self):
+        """Test requesting an unknown field returns 400"""
+        res = self.client.get(RECIPES_URL, {"fields": "id,user"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_recipes_expand_relations(self):
+        """Test ?expand= nests tags and ingredients in one query each"""
+        for i in range(5):
+            recipe = sample_recipe(user=self.user, title=f"Recipe {i}")
+            recipe.tags.add(sample_tag(user=self.user, name=f"Tag {i}"))
+            recipe.ingredients.add(
+                sample_ingredient(user=self.user, name=f"Ingredient {i}")
+            )
+
+        with self.assertNumQueries(3):
+            res = self.client.get(
+                RECIPES_URL,
+                {"expand": "tags,ingredients"}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        first = res.data["results"][0]
+        self.assertEqual(first["tags"][0]["name"], "Tag 4")
+        self.assertEqual(first["ingredients"][0]["name"], "Ingredient 4")
+
+    def test_list_recipes_expand_unknown_relation(self):
+        """Test expanding a field that is not a relation returns 400"""
+        res = self.client.get(RECIPES_URL, {"expand": "title"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_recipes_by_tags_returns_unique(self):
+        """Test a recipe matching several filter tags is returned once"""
+        recipe = sample_recipe(user=self.user)
+        tag_1 = sample_tag(user=self.user, name="Vegan")
+        tag_2 = sample_tag(user=self.user, name="Quick")
+        ingredient = sample_ingredient(user=self.user)
+        recipe.tags.add(tag_1, tag_2)
+        recipe.ingredients.add(ingredient)
+
+        res = self.client.get(
+            RECIPES_URL,
+            {"tags": f"{tag_1.id},{tag_2.id}", "ingredients": ingredient.id}
+        )
+
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_filter_recipes_match_all_tags(self):
+        """Test match=all returns only recipes with every given tag"""
+        recipe_1 = sample_recipe(user=self.user, title="Vegan curry")
+        recipe_2 = sample_recipe(user=self.user, title="Vegan salad")
+        tag_1 = sample_tag(user=self.user, name="Vegan")
+        tag_2 = sample_tag(user=self.user, name="Spicy")
+        recipe_1.tags.add(tag_1, tag_2)
+        recipe_2.tags.add(tag_1)
+
+        res = self.client.get(
+            RECIPES_URL,
+            {"tags": f"{tag_1.id},{tag_2.id}", "match": "all"}
+        )
+
+        ids = [item["id"] for item in res.data["results"]]
+        self.assertEqual(ids, [recipe_1.id])
+
+    def test_filter_recipes_empty_ids_ignored(self):
+        """Test a related filter without ids is ignored in both modes"""
+        recipe_1 = sample_recipe(user=self.user, title="Vegan curry")
+        recipe_2 = sample_recipe(user=self.user, title="Plain toast")
+        recipe_1.tags.add(sample_tag(user=self.user, name="Vegan"))
+
+        for match in ("any", "all"):
+            res = self.client.get(
+                RECIPES_URL, {"tags": ",", "ingredients": " ", "match": match}
+            )
+
+            ids = {item["id"] for item in res.data["results"]}
+            self.assertEqual(ids, {recipe_1.id, recipe_2.id})
+
+    def test_filter_recipes_invalid_params(self):
+        """Test invalid filter params return a bad request"""
+        res_match = self.client.get(RECIPES_URL, {"match": "some"})
+        res_tags = self.client.get(RECIPES_URL, {"tags": "a,b"})
+
+        self.assertEqual(res_match.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res_tags.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_recipes_by_time_and_price(self):
+        """Test range filters combine with each other and with tags"""
+        tag = sample_tag(user=self.user)
+        match = sample_recipe(
+            user=self.user, title="Quick", time_minutes=20, price=8
+        )
+        match.tags.add(tag)
+        slow = sample_recipe(
+            user=self.user, title="Slow", time_minutes=90, price=8
+        )
+        slow.tags.add(tag)
+        sample_recipe(user=self.user, title="Dear", time_minutes=20, price=25)
+        untagged = sample_recipe(
+            user=self.user, title="Untagged", time_minutes=20, price=8
+        )
+
+        res = self.client.get(RECIPES_URL, {
+            "time_minutes__lte": "30",
+            "time_minutes__gte": "10",
+            "price__lte": "10.00",
+        })
+        self.assertEqual(
+            [recipe["id"] for recipe in res.data["results"]],
+            [untagged.id, match.id]
+        )
+
+        res = self.client.get(RECIPES_URL, {
+            "time_minutes__lte": "30",
+            "price__lte": "10",
+            "tags": str(tag.id),
+        })
+        self.assertEqual(
+            [recipe["id"] for recipe in res.data["results"]],
+            [match.id]
+        )
+
+    def test_filter_recipes_invalid_range(self):
+        """Test non numeric range filters return 400"""
+        for params in (
+            {"price__lte": "cheap"},
+            {"price__gte": "NaN"},
+            {"time_minutes__lte": "1.5"},
+        ):
+            res = self.client.get(RECIPES_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_order_recipes_paginated_by_cursor(self):
+        """Test ?ordering= sorts recipes across cursor pages"""
+        prices = [7, 3, 9, 3, 5]
+        recipes = [
+            sample_recipe(user=self.user, title=f"Recipe {i}", price=price)
+            for i, price in enumerate(prices)
+        ]
+
+        res = self.client.get(
+            RECIPES_URL,
+            {"ordering": "-price", "page_size": 2}
+        )
+        ids = [item["id"] for item in res.data["results"]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            ids.extend(item["id"] for item in res.data["results"])
+
+        expected = sorted(recipes, key=lambda r: (r.price, r.id), reverse=True)
+        self.assertEqual(ids, [recipe.id for recipe in expected])
+
+    def test_order_recipes_invalid(self):
+        """Test ordering by an unsupported field returns 400"""
+        res = self.client.get(RECIPES_URL, {"ordering": "title"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_recipes(self):
+        """Test searching recipes by title, tag and ingredient names"""
+        curry = sample_recipe(user=self.user, title="Chicken curry")
+        salad = sample_recipe(user=self.user, title="Green salad")
+        soup = sample_recipe(user=self.user, title="Tomato soup")
+        salad.tags.add(sample_tag(user=self.user, name="Chicken"))
+        soup.ingredients.add(sample_ingredient(user=self.user, name="Basil"))
+
+        res_chicken = self.client.get(RECIPES_URL, {"search": "chicken"})
+        res_basil = self.client.get(RECIPES_URL, {"search": "basil"})
+
+        self.assertEqual(
+            [item["id"] for item in res_chicken.data["results"]],
+            [curry.id, salad.id]
+        )
+        self.assertEqual(
+            [item["id"] for item in res_basil.data["results"]],
+            [soup.id]
+        )
+
+    def test_search_reflects_renamed_tag(self):
+        """Test renaming a tag updates the recipes found by search"""
+        recipe = sample_recipe(user=self.user, title="Pancakes")
+        tag = sample_tag(user=self.user, name="Breakfast")
+        recipe.tags.add(tag)
+        tag.name = "Brunch"
+        tag.save()
+
+        res_old = self.client.get(RECIPES_URL, {"search": "breakfast"})
+        res_new = self.client.get(RECIPES_URL, {"search": "brunch"})
+
+        self.assertEqual(res_old.data["results"], [])
+        self.assertEqual(len(res_new.data["results"]), 1)
+
+    def test_search_results_paginated_by_rank(self):
+        """Test ranked search results can be paged with cursors"""
+        for i in range(5):
+            sample_recipe(user=self.user, title=f"Lemon cake {i}")
+
+        res = self.client.get(RECIPES_URL, {"search": "lemon", "page_size": 2})
+        ids = [item["id"] for item in res.data["results"]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            ids.extend(item["id"] for item in res.data["results"])
+
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(len(set(ids)), 5)
+
+    def test_search_results_with_distinct_ranks_paged_once(self):
+        """Test every search result is paged once when ranks differ"""
+        recipes = [
+            sample_recipe(
+                user=self.user,
+                title=" ".join(["lemon"] * (i + 1) + ["cake"] * (10 - i))
+            )
+            for i in range(10)
+        ]
+
+        res = self.client.get(RECIPES_URL, {"search": "lemon", "page_size": 1})
+        ids = [item["id"] for item in res.data["results"]]
+        while res.data["next"] and len(ids) <= len(recipes):
+            res = self.client.get(res.data["next"])
+            ids.extend(item["id"] for item in res.data["results"])
+
+        self.assertEqual(ids, [recipe.id for recipe in reversed(recipes)])
+
+    def test_view_recipe_detail_query_count(self):
+        """Test recipe detail prefetches its tags and ingredients"""
+        recipe = sample_recipe(user=self.user)
+        for i in range(5):
+            recipe.tags.add(sample_tag(user=self.user, name=f"Tag {i}"))
+            recipe.ingredients.add(
+                sample_ingredient(user=self.user, name=f"Ingredient {i}")
+            )
+
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(len(res.data["tags"]), 5)
+        self.assertEqual(len(res.data["ingredients"]), 5)
 
     def test_view_recipe_detail(self):
         """Test viewing a recipe detail"""
@@ -167,6 +506,52 @@ class PrivateRecipeApiTests(TestCase):
         self.assertIn(ingredient1, ingredients)
         self.assertIn(ingredient2, ingredients)
 
+    def test_create_recipe_related_ids_validated_in_one_query(self):
+        """Test submitted ingredient ids are resolved with one query"""
+        ingredients = [
+            sample_ingredient(user=self.user, name=f"Ingredient {i}")
+            for i in range(20)
+        ]
+        payload = {
+            "title": "Stew",
+            "ingredients": [ingredient.id for ingredient in ingredients],
+            "tags": [],
+            "time_minutes": 45,
+            "price": "15.00"
+        }
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(RECIPES_URL, payload, format="json")
+
+        lookups = [
+            query for query in ctx.captured_queries
+            if '"core_ingredient"."user_id" = ' in query["sql"]
+        ]
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(lookups), 1)
+        self.assertEqual(len(res.data["ingredients"]), 20)
+
+    def test_create_recipe_with_other_users_tag(self):
+        """Test a recipe cannot reference another user's tag"""
+        user2 = get_user_model().objects.create_user(
+            "user2@test.com",
+            "pass2"
+        )
+        tag = sample_tag(user=user2)
+        payload = {
+            "title": "Cheesecake",
+            "tags": [tag.id],
+            "ingredients": [],
+            "time_minutes": 60,
+            "price": "20.00"
+        }
+
+        res = self.client.post(RECIPES_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("tags", res.data)
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
     def test_partial_update_recipe(self):
         """Test updating a recipe with patch"""
         recipe = sample_recipe(user=self.user)
@@ -206,6 +591,127 @@ class PrivateRecipeApiTests(TestCase):
         tags = recipe.tags.all()
         self.assertEqual(len(tags), 0)
 
+    def test_bulk_create_recipes(self):
+        """Test creating several recipes with their relations at once"""
+        tag = sample_tag(user=self.user)
+        ingredient = sample_ingredient(user=self.user)
+        payload = [
+            {
+                "title": f"Recipe {i}",
+                "time_minutes": 10,
+                "price": "5.00",
+                "tags": [tag.id],
+                "ingredients": [ingredient.id],
+            }
+            for i in range(3)
+        ]
+
+        res = self.client.post(BULK_RECIPES_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [item["title"] for item in res.data],
+            ["Recipe 0", "Recipe 1", "Recipe 2"]
+        )
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 3)
+        for recipe in recipes:
+            self.assertEqual(list(recipe.tags.all()), [tag])
+            self.assertEqual(list(recipe.ingredients.all()), [ingredient])
+
+    def test_bulk_update_recipes(self):
+        """Test updating existing recipes and replacing their tags"""
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(sample_tag(user=self.user))
+        new_tag = sample_tag(user=self.user, name="Curry")
+        payload = [{
+            "id": recipe.id,
+            "title": "Chicken tikka",
+            "time_minutes": 25,
+            "price": "8.00",
+            "tags": [new_tag.id],
+            "ingredients": [],
+        }]
+
+        res = self.client.post(BULK_RECIPES_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, "Chicken tikka")
+        self.assertEqual(recipe.time_minutes, 25)
+        self.assertEqual(list(recipe.tags.all()), [new_tag])
+
+    def test_bulk_related_ids_validated_in_one_query(self):
+        """Test the tag and ingredient ids of all items share one query"""
+        tags = [sample_tag(user=self.user, name=f"Tag {i}") for i in range(5)]
+        salt = sample_ingredient(user=self.user)
+        payload = [
+            {"title": f"Recipe {i}", "time_minutes": 5, "price": "1.00",
+             "tags": [tags[i % 5].id, tags[(i + 1) % 5].id],
+             "ingredients": [salt.id]}
+            for i in range(20)
+        ]
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(BULK_RECIPES_URL, payload, format="json")
+
+        lookups = [
+            query for query in ctx.captured_queries
+            if '"core_tag"."user_id" = ' in query["sql"]
+            or '"core_ingredient"."user_id" = ' in query["sql"]
+        ]
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(lookups), 2)
+
+    def test_bulk_invalid_items_write_nothing(self):
+        """Test per item errors are returned and nothing is written"""
+        user2 = get_user_model().objects.create_user(
+            "user2@test.com",
+            "pass2"
+        )
+        other = sample_recipe(user=user2)
+        payload = [
+            {"title": "Valid", "time_minutes": 5, "price": "1.00",
+             "tags": [], "ingredients": []},
+            {"title": "", "time_minutes": 5, "price": "1.00",
+             "tags": [], "ingredients": []},
+            {"id": other.id, "title": "Stolen", "time_minutes": 5,
+             "price": "1.00", "tags": [], "ingredients": []},
+        ]
+
+        res = self.client.post(BULK_RECIPES_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn("title", res.data[1])
+        self.assertIn("id", res.data[2])
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+        other.refresh_from_db()
+        self.assertEqual(other.title, "Sample recipe")
+
+    def test_bulk_non_integer_ids_rejected(self):
+        """Test ids that are not integers are item errors, not crashes"""
+        recipe = sample_recipe(user=self.user)
+        payload = [
+            {"id": value, "title": "Renamed", "time_minutes": 5,
+             "price": "1.00", "tags": [], "ingredients": []}
+            for value in ([recipe.id], True, str(recipe.id), {"id": 1})
+        ]
+
+        res = self.client.post(BULK_RECIPES_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        for item_errors in res.data:
+            self.assertIn("id", item_errors)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, "Sample recipe")
+
+    def test_bulk_requires_list(self):
+        """Test the bulk endpoint rejects a non list payload"""
+        res = self.client.post(BULK_RECIPES_URL, {"title": "x"}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class RecipeImageUploadTests(TestCase):
 
@@ -235,6 +741,286 @@ class RecipeImageUploadTests(TestCase):
         self.assertIn("image", res.data)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    @patch("recipe.views.schedule_renditions")
+    def test_upload_image_schedules_renditions(self, mock_schedule):
+        """Test uploading an image queues its renditions off the request"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as ntf:
+            Image.new("RGB", (10, 10)).save(ntf, format="JPEG")
+            ntf.seek(0)
+            res = self.client.post(url, {"image": ntf}, format="multipart")
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(res.data["renditions"], {})
+        mock_schedule.assert_called_once_with(self.recipe)
+
+    @patch("recipe.views.schedule_renditions")
+    def test_render_image_renditions(self, mock_schedule):
+        """Test renditions are resized, stored and exposed"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as ntf:
+            Image.new("RGB", (2000, 1000)).save(ntf, format="JPEG")
+            ntf.seek(0)
+            self.client.post(url, {"image": ntf}, format="multipart")
+        self.recipe.refresh_from_db()
+
+        renditions = render_image(self.recipe.id, self.recipe.image.name)
+        self.recipe.refresh_from_db()
+        res = self.client.get(detail_url(self.recipe.id))
+
+        try:
+            thumbnail = renditions["thumbnail"]["jpeg"]
+            with Image.open(self.recipe.image.storage.path(thumbnail)) as img:
+                self.assertEqual(img.size, (150, 75))
+            self.assertEqual(self.recipe.image_renditions, renditions)
+            self.assertIn(
+                thumbnail,
+                res.data["renditions"]["thumbnail"]["jpeg"]
+            )
+        finally:
+            for paths in renditions.values():
+                for path in paths.values():
+                    self.recipe.image.storage.delete(path)
+
+    @patch("recipe.views.schedule_renditions")
+    def test_render_image_renditions_upright(self, mock_schedule):
+        """Test renditions are turned by the EXIF orientation"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as ntf:
+            ntf.write(rotated_jpeg((200, 100)).getvalue())
+            ntf.seek(0)
+            self.client.post(url, {"image": ntf}, format="multipart")
+        self.recipe.refresh_from_db()
+
+        renditions = render_image(self.recipe.id, self.recipe.image.name)
+
+        try:
+            thumbnail = renditions["thumbnail"]["jpeg"]
+            with Image.open(self.recipe.image.storage.path(thumbnail)) as img:
+                self.assertEqual(img.size, (75, 150))
+        finally:
+            for paths in renditions.values():
+                for path in paths.values():
+                    self.recipe.image.storage.delete(path)
+
+    def _append_chunk(self, upload_id, data, offset):
+        return self.client.patch(
+            image_upload_chunk_url(self.recipe.id, upload_id),
+            data,
+            content_type="application/octet-stream",
+            HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    @patch("recipe.views.schedule_renditions")
+    def test_chunked_image_upload(self, mock_schedule):
+        """Test uploading an image in resumable chunks"""
+        buffer = BytesIO()
+        Image.new("RGB", (100, 100)).save(buffer, format="JPEG")
+        content = buffer.getvalue()
+        half = len(content) // 2
+
+        res = self.client.post(
+            image_uploads_url(self.recipe.id),
+            {"filename": "photo.jpg"}
+        )
+        upload_id = res.data["id"]
+        res_1 = self._append_chunk(upload_id, content[:half], 0)
+        res_stale = self._append_chunk(upload_id, content[half:], 0)
+        res_resume = self.client.get(
+            image_upload_chunk_url(self.recipe.id, upload_id)
+        )
+        res_2 = self._append_chunk(upload_id, content[half:], half)
+        res_done = self.client.post(
+            image_upload_finalize_url(self.recipe.id, upload_id)
+        )
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res_1.data["offset"], half)
+        self.assertEqual(res_stale.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res_resume.data["offset"], half)
+        self.assertEqual(res_2.data["offset"], len(content))
+        self.assertEqual(res_done.status_code, status.HTTP_200_OK)
+        with open(self.recipe.image.path, "rb") as image_file:
+            self.assertEqual(image_file.read(), content)
+        mock_schedule.assert_called_once_with(self.recipe)
+
+    @patch("recipe.views.schedule_renditions")
+    def test_chunked_image_upload_resumed_during_stalled_chunk(
+            self, mock_schedule):
+        """Test a resumed chunk wins over one still being received"""
+        buffer = BytesIO()
+        Image.new("RGB", (100, 100)).save(buffer, format="JPEG")
+        content = buffer.getvalue()
+        res = self.client.post(
+            image_uploads_url(self.recipe.id),
+            {"filename": "photo.jpg"}
+        )
+        upload_id = res.data["id"]
+        upload = RecipeImageUpload.objects.get(id=upload_id)
+        resumed = []
+
+        class StalledStream(BytesIO):
+            def read(stream, size=-1):
+                if not resumed:
+                    resumed.append(self._append_chunk(upload_id, content, 0))
+                return super().read(size)
+
+        with self.assertRaises(uploads.UploadError) as cm:
+            uploads.append_chunk(upload, StalledStream(content[:50]), 0)
+        res_done = self.client.post(
+            image_upload_finalize_url(self.recipe.id, upload_id)
+        )
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(resumed[0].data["offset"], len(content))
+        self.assertEqual(cm.exception.status, status.HTTP_409_CONFLICT)
+        self.assertEqual(upload.offset, len(content))
+        self.assertEqual(res_done.status_code, status.HTTP_200_OK)
+        with open(self.recipe.image.path, "rb") as image_file:
+            self.assertEqual(image_file.read(), content)
+
+    def test_chunked_image_upload_rejects_non_image(self):
+        """Test the first chunk must start with an image header"""
+        res = self.client.post(
+            image_uploads_url(self.recipe.id),
+            {"filename": "photo.jpg"}
+        )
+
+        res_chunk = self._append_chunk(res.data["id"], b"not an image", 0)
+
+        self.assertEqual(res_chunk.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res_chunk.data["offset"], 0)
+
+    def test_chunked_image_upload_malformed_id(self):
+        """Test an upload id that is not a UUID returns 404"""
+        res = self.client.get(image_upload_chunk_url(self.recipe.id, "---"))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_chunked_image_upload_rejects_bad_filename(self):
+        """Test uploads need a plain file name with an image extension"""
+        for filename in ("x.html", "photo.jpg/../x.html", "a/b.png", ".png"):
+            res = self.client.post(
+                image_uploads_url(self.recipe.id),
+                {"filename": filename}
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(IMAGE_RELEASE_MIN_AGE=-60)
+    @patch("recipe.views.schedule_renditions")
+    def test_identical_images_stored_once(self, mock_schedule):
+        """Test the same image uploaded twice shares one file"""
+        recipe_2 = sample_recipe(user=self.user)
+        for recipe in (self.recipe, recipe_2):
+            with tempfile.NamedTemporaryFile(suffix=".jpg") as ntf:
+                Image.new("RGB", (10, 10), "red").save(ntf, format="JPEG")
+                ntf.seek(0)
+                self.client.post(
+                    image_upload_url(recipe.id),
+                    {"image": ntf},
+                    format="multipart"
+                )
+        self.recipe.refresh_from_db()
+        recipe_2.refresh_from_db()
+        path = self.recipe.image.path
+
+        released_shared = release_image(self.recipe.image.name)
+        recipe_2.delete()
+        released_still_used = release_image(self.recipe.image.name)
+        self.recipe.delete()
+        released_last = release_image(recipe_2.image.name)
+
+        self.assertEqual(self.recipe.image.name, recipe_2.image.name)
+        self.assertFalse(released_shared)
+        self.assertFalse(released_still_used)
+        self.assertTrue(released_last)
+        self.assertFalse(os.path.exists(path))
+
+    @patch("recipe.views.schedule_renditions")
+    def test_release_keeps_reused_image(self, mock_schedule):
+        """Test an image reused by an identical upload is not released"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as ntf:
+            Image.new("RGB", (10, 10), "red").save(ntf, format="JPEG")
+            ntf.seek(0)
+            self.client.post(url, {"image": ntf}, format="multipart")
+        self.recipe.refresh_from_db()
+        path = self.recipe.image.path
+        os.utime(path, (0, 0))
+        self.recipe.image.storage.save(
+            self.recipe.image.name,
+            self.recipe.image.file
+        )
+        Recipe.objects.filter(pk=self.recipe.pk).update(image=None)
+
+        released = release_image(self.recipe.image.name)
+
+        self.assertFalse(released)
+        self.assertGreater(os.path.getmtime(path), 0)
+
+    @override_settings(IMAGE_MAX_DIMENSION=100)
+    @patch("recipe.views.schedule_renditions")
+    def test_upload_image_downscaled(self, mock_schedule):
+        """Test images larger than the cap are stored downscaled"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as ntf:
+            Image.new("RGB", (400, 200)).save(ntf, format="JPEG")
+            ntf.seek(0)
+            res = self.client.post(url, {"image": ntf}, format="multipart")
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with Image.open(self.recipe.image.path) as img:
+            self.assertEqual(img.size, (100, 50))
+
+    @override_settings(IMAGE_MAX_DIMENSION=100)
+    @patch("recipe.views.schedule_renditions")
+    def test_upload_image_downscaled_upright(self, mock_schedule):
+        """Test downscaled images are turned by their EXIF orientation"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as ntf:
+            ntf.write(rotated_jpeg((400, 200)).getvalue())
+            ntf.seek(0)
+            self.client.post(url, {"image": ntf}, format="multipart")
+
+        self.recipe.refresh_from_db()
+        with Image.open(self.recipe.image.path) as img:
+            self.assertEqual(img.size, (50, 100))
+
+    @override_settings(IMAGE_MAX_PIXELS=50)
+    def test_upload_image_too_many_pixels(self):
+        """Test images above the pixel limit are rejected"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as ntf:
+            Image.new("RGB", (10, 10)).save(ntf, format="JPEG")
+            ntf.seek(0)
+            res = self.client.post(url, {"image": ntf}, format="multipart")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("image", res.data)
+
+    @override_settings(IMAGE_MAX_FULL_DECODE_PIXELS=50)
+    @patch("recipe.views.schedule_renditions")
+    def test_upload_image_full_decode_pixel_cap(self, mock_schedule):
+        """Test formats without reduced decoding have a lower pixel cap"""
+        url = image_upload_url(self.recipe.id)
+        responses = {}
+        for ext, image_format in (("jpg", "JPEG"), ("png", "PNG")):
+            with tempfile.NamedTemporaryFile(suffix=f".{ext}") as ntf:
+                Image.new("RGB", (10, 10)).save(ntf, format=image_format)
+                ntf.seek(0)
+                responses[ext] = self.client.post(
+                    url, {"image": ntf}, format="multipart"
+                )
+
+        self.assertEqual(responses["jpg"].status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            responses["png"].status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+
     def test_upload_image_bad_request(self):
         """Test uploading an invalid image"""
         url = image_upload_url(self.recipe.id)
@@ -262,9 +1048,9 @@ class RecipeImageUploadTests(TestCase):
         serializer_1 = RecipeSerializer(recipe_1)
         serializer_2 = RecipeSerializer(recipe_2)
         serializer_3 = RecipeSerializer(recipe_3)
-        self.assertIn(serializer_1.data, res.data)
-        self.assertIn(serializer_2.data, res.data)
-        self.assertNotIn(serializer_3.data, res.data)
+        self.assertIn(serializer_1.data, res.data["results"])
+        self.assertIn(serializer_2.data, res.data["results"])
+        self.assertNotIn(serializer_3.data, res.data["results"])
 
     def test_filter_recipes_by_ingredients(self):
         """Test returning recipes with specific ingredients"""
@@ -286,6 +1072,6 @@ class RecipeImageUploadTests(TestCase):
         serializer_1 = RecipeSerializer(recipe_1)
         serializer_2 = RecipeSerializer(recipe_2)
         serializer_3 = RecipeSerializer(recipe_3)
-        self.assertIn(serializer_1.data, res.data)
-        self.assertIn(serializer_2.data, res.data)
-        self.assertNotIn(serializer_3.data, res.data)
+        self.assertIn(serializer_1.data, res.data["results"])
+        self.assertIn(serializer_2.data, res.data["results"])
+        self.assertNotIn(serializer_3.data, res.data["results"])
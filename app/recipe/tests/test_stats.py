@@ -0,0 +1,157 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, RecipeStats, Tag, Ingredient
+from recipe.stats import rebuild_stats
+
+
+STATS_URL = reverse("recipe:stats")
+BULK_RECIPES_URL = reverse("recipe:recipe-bulk")
+
+
+def sample_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        "title": "Sample recipe",
+        "time_minutes": 10,
+        "price": 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class PublicRecipeStatsTests(TestCase):
+    """Test unauthenticated access to recipe stats"""
+
+    def test_auth_required(self):
+        """Test that authentication is required"""
+        res = APIClient().get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class RecipeStatsTests(TestCase):
+    """Test the incrementally maintained recipe stats"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@outlook.com",
+            "test123"
+        )
+        self.client.force_authenticate(self.user)
+        self.vegan = Tag.objects.create(user=self.user, name="Vegan")
+        self.quick = Tag.objects.create(user=self.user, name="Quick")
+        self.salt = Ingredient.objects.create(user=self.user, name="Salt")
+
+    def snapshot(self):
+        """Return the user's stats and recipe counts as stored"""
+        stats = RecipeStats.objects.filter(user=self.user).values(
+            "recipe_count", "price_total", "price_min", "price_max",
+            "time_total", "time_min", "time_max"
+        ).first()
+        counts = {
+            (type(obj).__name__, obj.name): obj.recipe_count
+            for obj in list(Tag.objects.all()) + list(Ingredient.objects.all())
+        }
+        return stats, counts
+
+    def assertStatsMatchRebuild(self):
+        """Check the running stats equal stats recomputed from scratch"""
+        incremental = self.snapshot()
+        rebuild_stats()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_stats_follow_recipe_changes(self):
+        """Test creating, updating and deleting recipes updates stats"""
+        cheap = sample_recipe(self.user, price=2, time_minutes=5)
+        dear = sample_recipe(self.user, price=9.5, time_minutes=60)
+        sample_recipe(self.user, price=4, time_minutes=20)
+        self.assertStatsMatchRebuild()
+
+        dear.price = 7
+        dear.save()
+        self.assertStatsMatchRebuild()
+
+        cheap.delete()
+        self.assertStatsMatchRebuild()
+        stats = RecipeStats.objects.get(user=self.user)
+        self.assertEqual(stats.recipe_count, 2)
+        self.assertEqual(stats.price_min, Decimal("4.00"))
+        self.assertEqual(stats.time_max, 60)
+
+    def test_stats_follow_relation_changes(self):
+        """Test tag and ingredient counts follow every kind of m2m change"""
+        first = sample_recipe(self.user)
+        second = sample_recipe(self.user)
+        first.tags.add(self.vegan, self.quick)
+        first.tags.add(self.vegan)
+        second.ingredients.add(self.salt)
+        self.quick.recipe_set.add(second)
+        self.assertStatsMatchRebuild()
+
+        first.tags.remove(self.quick, self.vegan)
+        first.tags.remove(self.quick)
+        self.assertStatsMatchRebuild()
+
+        self.quick.recipe_set.clear()
+        second.ingredients.clear()
+        self.assertStatsMatchRebuild()
+
+        first.tags.set([self.vegan])
+        second.delete()
+        self.assertStatsMatchRebuild()
+        self.vegan.refresh_from_db()
+        self.assertEqual(self.vegan.recipe_count, 1)
+
+    def test_bulk_write_updates_stats(self):
+        """Test bulk creating and updating recipes updates stats"""
+        recipe = sample_recipe(self.user, price=3)
+        recipe.tags.add(self.vegan)
+
+        res = self.client.post(BULK_RECIPES_URL, [
+            {"id": recipe.id, "title": "Updated", "time_minutes": 15,
+             "price": "1.00", "tags": [self.quick.id], "ingredients": []},
+            {"title": "New", "time_minutes": 30, "price": "8.00",
+             "tags": [self.quick.id], "ingredients": [self.salt.id]},
+        ], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertStatsMatchRebuild()
+
+    def test_retrieve_stats(self):
+        """Test the stats endpoint reads the stored stats"""
+        recipe = sample_recipe(self.user, price=2, time_minutes=10)
+        recipe.tags.add(self.vegan)
+        recipe = sample_recipe(self.user, price=3, time_minutes=25)
+        recipe.tags.add(self.vegan, self.quick)
+
+        with self.assertNumQueries(3):
+            res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["recipe_count"], 2)
+        self.assertEqual(res.data["price_total"], "5.00")
+        self.assertEqual(res.data["price_avg"], "2.50")
+        self.assertEqual(res.data["price_min"], "2.00")
+        self.assertEqual(res.data["time_avg"], 17.5)
+        self.assertEqual(res.data["time_max"], 25)
+        self.assertEqual(
+            [(tag["name"], tag["recipe_count"]) for tag in res.data["tags"]],
+            [("Vegan", 2), ("Quick", 1)]
+        )
+        self.assertEqual(res.data["ingredients"], [])
+
+    def test_retrieve_stats_without_recipes(self):
+        """Test a user without recipes gets empty stats"""
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["recipe_count"], 0)
+        self.assertIsNone(res.data["price_avg"])
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 
@@ -8,6 +10,7 @@ from core.models import Tag, Recipe
 from recipe.serializers import TagSerializer
 
 TAGS_URL = reverse("recipe:tag-list")
+TAGS_BULK_URL = reverse("recipe:tag-bulk")
 
 
 class PublicTagsApiTests(TestCase):
@@ -44,7 +47,31 @@ class PrivateTagsApiTests(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
+
+    def test_retrieve_tags_sparse_fields(self):
+        """Test ?fields= limits the tag fields returned"""
+        Tag.objects.create(user=self.user, name="Vegan")
+
+        res = self.client.get(TAGS_URL, {"fields": "name"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"], [{"name": "Vegan"}])
+
+    def test_retrieve_tags_paginated_by_cursor(self):
+        """Test tags are paged by name without repeats"""
+        tags = [Tag.objects.create(user=self.user, name=name)
+                for name in ("Vegan", "Spicy", "Quick")]
+        Tag.objects.create(user=self.user, name="Brunch")
+
+        res = self.client.get(TAGS_URL, {"page_size": 2})
+        ids = [item["id"] for item in res.data["results"]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            ids.extend(item["id"] for item in res.data["results"])
+
+        self.assertEqual(len(ids), 4)
+        self.assertEqual(ids[:3], [tag.id for tag in tags])
 
     def test__tags_retrieved_is_limited_by_user(self):
         """Test tags returned are for the authenticated user"""
@@ -58,8 +85,8 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]["name"], tag.name)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["name"], tag.name)
 
     def test_create_tag_successful(self):
         """Test creating a new tag"""
@@ -80,6 +107,43 @@ class PrivateTagsApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_create_tag_duplicate_name(self):
+        """Test creating a tag with an existing name fails"""
+        Tag.objects.create(user=self.user, name="Vegan")
+
+        res = self.client.post(TAGS_URL, {"name": "Vegan"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_get_or_create_tags(self):
+        """Test tags are fetched or created by name in input order"""
+        existing = Tag.objects.create(user=self.user, name="Vegan")
+        Tag.objects.create(user=get_user_model().objects.create_user(
+            "user2@outlook.com",
+            "test321"
+        ), name="Spicy")
+        names = ["Spicy", "Vegan", "Quick", "Spicy"]
+
+        res = self.client.post(
+            TAGS_BULK_URL,
+            {"names": names},
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["name"] for item in res.data], names)
+        self.assertEqual(res.data[1]["id"], existing.id)
+        self.assertEqual(res.data[0]["id"], res.data[3]["id"])
+        tags = Tag.objects.filter(user=self.user)
+        self.assertEqual(tags.count(), 3)
+        self.assertIn(res.data[0]["id"], [tag.id for tag in tags])
+
+    def test_bulk_tags_invalid(self):
+        """Test the bulk endpoint rejects an empty list of names"""
+        res = self.client.post(TAGS_BULK_URL, {"names": []}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_get_tags_assigned_to_recipes(self):
         """Test filtering tags by those assigned to recipes"""
         tag_1 = Tag.objects.create(user=self.user, name="Breakfast")
@@ -97,8 +161,8 @@ class PrivateTagsApiTests(TestCase):
         serializer_1 = TagSerializer(tag_1)
         serializer_2 = TagSerializer(tag_2)
 
-        self.assertIn(serializer_1.data, res.data)
-        self.assertNotIn(serializer_2.data, res.data)
+        self.assertIn(serializer_1.data, res.data["results"])
+        self.assertNotIn(serializer_2.data, res.data["results"])
 
     def test_get_tags_assigned_unique(self):
         """Test filtering tags by assigned returns unique items"""
@@ -121,4 +185,23 @@ class PrivateTagsApiTests(TestCase):
 
         res = self.client.get(TAGS_URL, {"assigned_only": 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_get_tags_assigned_uses_semi_join(self):
+        """Test assigned tags are found with EXISTS rather than DISTINCT"""
+        tag = Tag.objects.create(user=self.user, name="Breakfast")
+        recipe = Recipe.objects.create(
+            title="Pancakes",
+            time_minutes=10,
+            price=2.00,
+            user=self.user
+        )
+        recipe.tags.add(tag)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(TAGS_URL, {"assigned_only": 1})
+
+        sql = ctx.captured_queries[-1]["sql"]
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertIn("EXISTS", sql)
+        self.assertNotIn("DISTINCT", sql)
@@ -0,0 +1,186 @@
+import os
+import shutil
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from core.models import (
+    RecipeImageUpload,
+    recipe_image_file_path,
+    content_image_path
+)
+from recipe.images import downscale_image, ImageTooLarge
+
+
+READ_SIZE = 64 * 1024
+IMAGE_SIGNATURES = (
+    (0, b"\xff\xd8\xff"),
+    (0, b"\x89PNG\r\n\x1a\n"),
+    (0, b"GIF87a"),
+    (0, b"GIF89a"),
+    (8, b"WEBP"),
+)
+
+
+class UploadError(Exception):
+    """Raised when a chunk cannot be appended to an upload"""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+def new_upload_path(recipe, filename):
+    """Return the storage path a new chunked upload is staged under"""
+    return recipe_image_file_path(recipe, filename)
+
+
+def part_path(upload):
+    """Return the filesystem path chunks are written to"""
+    return default_storage.path(upload.path) + ".part"
+
+
+def check_image_header(head):
+    """Check the first bytes of an upload are a supported image
+
+    Only the file signature is checked, as a first chunk may end before
+    the headers Pillow needs; the whole file is verified on finalize.
+    """
+    if head[8:12] == b"WEBP" and not head.startswith(b"RIFF"):
+        return False
+
+    return any(
+        head[start:start + len(signature)] == signature
+        for start, signature in IMAGE_SIGNATURES
+    )
+
+
+def _receive_chunk(stream, path, offset):
+    """Stream a chunk starting at offset to path, return the end offset"""
+    data = stream.read(READ_SIZE) if stream is not None else b""
+    if offset == 0 and not check_image_header(data):
+        raise UploadError("Upload a valid image.", 400)
+
+    with open(path, "wb") as chunk:
+        while data:
+            offset += len(data)
+            if offset > settings.IMAGE_UPLOAD_MAX_BYTES:
+                raise UploadError("Upload too large.", 413)
+            chunk.write(data)
+            data = stream.read(READ_SIZE)
+
+    return offset
+
+
+def append_chunk(upload, stream, offset):
+    """Stream a chunk to disk at offset and return the new offset
+
+    The body is copied in fixed size reads to a file of its own, with
+    no transaction open, so a stalled client holds neither a database
+    connection nor a lock. The chunk is then copied into the upload
+    under a short row lock, only if the offset is still the one it was
+    sent for, so a resumed chunk is never blocked by, or overwritten
+    by, an abandoned one.
+    """
+    if offset != upload.offset:
+        raise UploadError("Upload offset mismatch.", 409)
+
+    path = part_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    chunk_path = f"{path}.{uuid.uuid4().hex}"
+    try:
+        end = _receive_chunk(stream, chunk_path, offset)
+        with transaction.atomic():
+            current = RecipeImageUpload.objects.select_for_update().filter(
+                pk=upload.pk
+            ).values_list("offset", flat=True).first()
+            if current is None:
+                raise UploadError("Upload not found.", 404)
+            if current != offset:
+                upload.offset = current
+                raise UploadError("Upload offset mismatch.", 409)
+
+            with open(chunk_path, "rb") as chunk, \
+                    open(path, "r+b" if offset else "wb") as part:
+                part.seek(offset)
+                shutil.copyfileobj(chunk, part, READ_SIZE)
+                part.truncate()
+            upload.offset = end
+            upload.save(update_fields=["offset"])
+    finally:
+        if os.path.exists(chunk_path):
+            os.remove(chunk_path)
+
+    return end
+
+
+def finalize_upload(upload):
+    """Move a completed upload into place and return its storage path
+
+    The file is stored under its content hash; if an identical image is
+    already stored the upload is dropped and the stored copy reused.
+    """
+    path = part_path(upload)
+    if not upload.offset or not os.path.exists(path):
+        raise UploadError("Upload is empty.", 400)
+
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Exception:
+        raise UploadError("Upload a valid image.", 400)
+
+    try:
+        with open(path, "rb") as part:
+            downscaled = downscale_image(part)
+    except ImageTooLarge as exc:
+        raise UploadError(str(exc), 400)
+    if downscaled is not None:
+        with open(path, "wb") as part:
+            part.write(downscaled.read())
+
+    with open(path, "rb") as part:
+        name = content_image_path(part, upload.path.split(".")[-1])
+    if default_storage.reuse(name):
+        os.remove(path)
+    else:
+        os.makedirs(
+            os.path.dirname(default_storage.path(name)),
+            exist_ok=True
+        )
+        os.replace(path, default_storage.path(name))
+
+    return name
+
+
+def discard_upload(upload):
+    """Remove the partial file of an upload"""
+    path = part_path(upload)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def expire_uploads(dry_run=False):
+    """Delete uploads not finalized within IMAGE_UPLOAD_EXPIRY seconds
+
+    Returns how many uploads expired, or would expire on a dry run.
+    """
+    cutoff = timezone.now() - timedelta(
+        seconds=settings.IMAGE_UPLOAD_EXPIRY
+    )
+    expired = RecipeImageUpload.objects.filter(created_at__lt=cutoff)
+    if dry_run:
+        return expired.count()
+
+    count = 0
+    for upload in expired.iterator():
+        discard_upload(upload)
+        upload.delete()
+        count += 1
+
+    return count
@@ -1,19 +1,88 @@
+import re
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
+from rest_framework import generics, viewsets, mixins, status
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 
-from core.models import Tag, Ingredient, Recipe
-from recipe import serializers
+from core.models import (
+    Tag,
+    Ingredient,
+    Recipe,
+    RecipeImageUpload,
+    RecipeStats
+)
+from core.renderers import StreamingJSONResponse
+from recipe import serializers, filters, uploads
+from recipe.bulk import bulk_write_recipes
+from recipe.export import EXPORT_FORMATS, export_recipes, recipe_items
+from recipe.images import schedule_renditions, schedule_release
+from recipe.cache import CachedListMixin, bump_version
+from recipe.fastpath import ValuesListMixin
+from recipe.fields import resolve_related_objects
+from recipe.search import search_recipes, typeahead
+from recipe.pagination import (
+    RecipeCursorPagination,
+    RecipeAttrCursorPagination
+)
+from user.authentication import (
+    CachedTokenAuthentication,
+    SignedAccessTokenAuthentication
+)
+
+
+GZIP_ACCEPTED = re.compile(r"\bgzip\b")
+
+
+class SparseFieldsMixin:
+    """Limit list and detail responses to the fields in ?fields="""
+
+    def get_sparse_fields(self):
+        """Return the requested field names, or None for every field"""
+        value = self.request.query_params.get("fields")
+        if not value or self.action not in ("list", "retrieve"):
+            return None
 
+        fields = [name.strip() for name in value.split(",") if name.strip()]
+        available = self.get_serializer_class().Meta.fields
+        unknown = [name for name in fields if name not in available]
+        if unknown:
+            raise ValidationError(
+                {"fields": f"Unknown fields: {', '.join(unknown)}"}
+            )
+
+        return fields
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs.setdefault("fields", fields)
 
-class BaseRecipeAttrViewSet(viewsets.GenericViewSet,
+        return super().get_serializer(*args, **kwargs)
+
+
+class BaseRecipeAttrViewSet(CachedListMixin,
+                            ValuesListMixin,
+                            SparseFieldsMixin,
+                            viewsets.GenericViewSet,
                             mixins.ListModelMixin,
                             mixins.CreateModelMixin):
     """Base viewset for user owned recipe attributes"""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (
+        CachedTokenAuthentication,
+        SignedAccessTokenAuthentication,
+    )
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeAttrCursorPagination
+    typeahead_limit = 10
+    typeahead_max_limit = 50
 
     def get_queryset(self):
         """Return objects for the current authenticated user only"""
@@ -23,59 +92,177 @@ class BaseRecipeAttrViewSet(viewsets.GenericViewSet,
 
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            queryset = filters.filter_assigned(
+                queryset,
+                Recipe._meta.get_field(self.recipe_field)
+            )
 
-        return queryset.filter(
+        queryset = queryset.filter(
             user=self.request.user
-        ).order_by("-name").distinct()
+        ).order_by("-name", "-id")
+
+        query = self._typeahead_query()
+        if query:
+            return typeahead(queryset, query, self._typeahead_limit())
+
+        return queryset
+
+    def _typeahead_query(self):
+        """Return the ?q= typeahead value of a list request"""
+        if self.action != "list":
+            return ""
+
+        return self.request.query_params.get("q", "").strip()
+
+    def _typeahead_limit(self):
+        """Return how many typeahead matches to return"""
+        try:
+            limit = int(self.request.query_params["limit"])
+        except (KeyError, ValueError):
+            return self.typeahead_limit
+
+        return max(1, min(limit, self.typeahead_max_limit))
+
+    def paginate_queryset(self, queryset):
+        """Return typeahead matches as a single unpaginated list"""
+        if self._typeahead_query():
+            return None
+
+        return super().paginate_queryset(queryset)
 
     def perform_create(self, serializer):
         """Create a new object"""
         serializer.save(user=self.request.user)
 
+    @action(methods=["POST"], detail=False, url_path="bulk")
+    def bulk(self, request):
+        """Get or create objects by name, returned in input order
+
+        Missing names are inserted with a single INSERT ... ON CONFLICT
+        DO NOTHING against the (user, name) unique constraint.
+        """
+        serializer = serializers.NameListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        names = serializer.validated_data["names"]
+
+        model = self.queryset.model
+        model.objects.bulk_create(
+            [model(user=request.user, name=name) for name in set(names)],
+            ignore_conflicts=True
+        )
+        bump_version(request.user.pk)
+
+        objects = {
+            obj.name: obj
+            for obj in model.objects.filter(user=request.user, name__in=names)
+        }
+        serializer = self.get_serializer(
+            [objects[name] for name in names],
+            many=True
+        )
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 
 class TagViewSet(BaseRecipeAttrViewSet):
     """Manage tags in the database"""
     queryset = Tag.objects.all()
+    recipe_field = "tags"
     serializer_class = serializers.TagSerializer
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     """Manage ingredients in  the database"""
     queryset = Ingredient.objects.all()
+    recipe_field = "ingredients"
     serializer_class = serializers.IngredientSerializer
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CachedListMixin,
+                    ValuesListMixin,
+                    SparseFieldsMixin,
+                    viewsets.ModelViewSet):
     """Manage recipes in the database"""
     serializer_class = serializers.RecipeSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (
+        CachedTokenAuthentication,
+        SignedAccessTokenAuthentication,
+    )
     permission_classes = (IsAuthenticated,)
-
-    def _params_to_int(self, qs):
-        """Convert a list of string IDs to a list of integers"""
-        return [int(str_id) for str_id in qs.split(",")]
+    pagination_class = RecipeCursorPagination
+    related_models = {"tags": Tag, "ingredients": Ingredient}
+    field_columns = {"renditions": "image_renditions"}
+    bulk_max_items = 1000
 
     def get_queryset(self):
         """Get the recipes for the authenticated user"""
-        tags = self.request.query_params.get("tags")
-        ingredients = self.request.query_params.get("ingredients")
-        queryset = self.queryset
-        if tags:
-            tag_ids = self._params_to_int(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
-        if ingredients:
-            ingredient_ids = self._params_to_int(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+        queryset = filters.filter_recipes(
+            self.queryset,
+            self.request.query_params
+        )
+        queryset = queryset.filter(user=self.request.user).order_by("-id")
+        ordering = filters.get_ordering(self.request.query_params)
+
+        search = self.request.query_params.get("search", "").strip()
+        if search:
+            queryset = search_recipes(queryset, search)
+            ordering = ordering or ("-rank", "-id")
+
+        if ordering:
+            self.pagination_ordering = ordering
+            queryset = queryset.order_by(*ordering)
+
+        return self._apply_query_plan(queryset)
+
+    def _apply_query_plan(self, queryset):
+        """Load only the columns and relations a detail response needs
+
+        Lists are serialized from values() rows by ValuesListMixin.
+        """
+        if self.action != "retrieve":
+            return queryset
 
-        return queryset.filter(user=self.request.user)
+        fields = self.get_sparse_fields()
+        if fields is None:
+            fields = self.get_serializer_class().Meta.fields
+        columns = {"id"} | {
+            self.field_columns.get(name, name) for name in fields
+            if name not in self.related_models
+        }
+
+        return queryset.only(*columns).prefetch_related(*[
+            Prefetch(name, queryset=model.objects.only("id", "name"))
+            for name, model in self.related_models.items() if name in fields
+        ])
+
+    def get_expand_fields(self):
+        """Return the relations to nest in list output from ?expand="""
+        value = self.request.query_params.get("expand")
+        if not value or self.action != "list":
+            return []
+
+        expand = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = [name for name in expand if name not in self.related_models]
+        if unknown:
+            raise ValidationError(
+                {"expand": f"Cannot expand: {', '.join(unknown)}"}
+            )
+
+        return expand
+
+    def get_serializer(self, *args, **kwargs):
+        expand = self.get_expand_fields()
+        if expand:
+            kwargs.setdefault("expand", expand)
+
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_class(self):
         """Return correct serializer class"""
         if self.action == "retrieve":
             return serializers.RecipeDetailSerializer
-        elif self.action == "upload_image":
+        elif self.action in ("upload_image", "finalize_image_upload"):
             return serializers.RecipeImageSerializer
         return self.serializer_class
 
@@ -87,13 +274,17 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def upload_image(self, request, pk=None):
         """Upload an image to a recipe"""
         recipe = self.get_object()
+        previous_image = recipe.image.name
         serializer = self.get_serializer(
             recipe,
             data=request.data
         )
 
         if serializer.is_valid():
-            serializer.save()
+            recipe = serializer.save(image_renditions={})
+            schedule_renditions(recipe)
+            if previous_image != recipe.image.name:
+                schedule_release(previous_image)
             return Response(
                 serializer.data,
                 status=status.HTTP_200_OK
@@ -103,3 +294,213 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
+
+    @action(methods=["POST"], detail=True, url_path="image-uploads")
+    def start_image_upload(self, request, pk=None):
+        """Start a resumable chunked upload of a recipe image"""
+        recipe = self.get_object()
+        serializer = serializers.ImageUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        upload = RecipeImageUpload.objects.create(
+            recipe=recipe,
+            path=uploads.new_upload_path(
+                recipe,
+                serializer.validated_data["filename"]
+            )
+        )
+
+        return Response(
+            {"id": upload.id, "offset": upload.offset},
+            status=status.HTTP_201_CREATED
+        )
+
+    def _get_image_upload(self, upload_id, lock=False):
+        """Return an image upload of the requested recipe"""
+        queryset = RecipeImageUpload.objects.all()
+        if lock:
+            queryset = queryset.select_for_update()
+
+        return get_object_or_404(
+            queryset,
+            id=upload_id,
+            recipe=self.get_object()
+        )
+
+    @action(
+        methods=["GET", "PATCH"],
+        detail=True,
+        url_path=r"image-uploads/(?P<upload_id>[0-9a-f-]+)",
+        url_name="image-upload-chunk"
+    )
+    def append_image_upload(self, request, pk=None, upload_id=None):
+        """Return the offset of an upload, or append a chunk to it
+
+        A chunk is the raw request body and must start at the offset
+        given in the Upload-Offset header.
+        """
+        if request.method == "GET":
+            upload = self._get_image_upload(upload_id)
+            return Response({"id": upload.id, "offset": upload.offset})
+
+        try:
+            offset = int(request.META["HTTP_UPLOAD_OFFSET"])
+        except (KeyError, ValueError):
+            return Response(
+                {"detail": "Upload-Offset header required."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        upload = self._get_image_upload(upload_id)
+        try:
+            uploads.append_chunk(upload, request.stream, offset)
+        except uploads.UploadError as exc:
+            return Response(
+                {"detail": str(exc), "offset": upload.offset},
+                status=exc.status
+            )
+
+        return Response({"id": upload.id, "offset": upload.offset})
+
+    @action(
+        methods=["POST"],
+        detail=True,
+        url_path=r"image-uploads/(?P<upload_id>[0-9a-f-]+)/finalize",
+        url_name="image-upload-finalize"
+    )
+    def finalize_image_upload(self, request, pk=None, upload_id=None):
+        """Store a completed chunked upload as the recipe image"""
+        with transaction.atomic():
+            upload = self._get_image_upload(upload_id, lock=True)
+            try:
+                path = uploads.finalize_upload(upload)
+            except uploads.UploadError as exc:
+                return Response({"detail": str(exc)}, status=exc.status)
+
+            recipe = upload.recipe
+            previous_image = recipe.image.name
+            recipe.image.name = path
+            recipe.image_renditions = {}
+            recipe.save(update_fields=["image", "image_renditions"])
+            upload.delete()
+            if previous_image != path:
+                schedule_release(previous_image)
+        schedule_renditions(recipe)
+
+        serializer = self.get_serializer(recipe)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(methods=["POST"], detail=False, url_path="bulk")
+    def bulk(self, request):
+        """Create or update a list of recipes in one transaction
+
+        Items with an "id" update that recipe, the others are created.
+        Nothing is written unless every item is valid; errors are
+        returned as a list aligned with the input.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"detail": "Expected a non-empty list of recipes."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > self.bulk_max_items:
+            return Response(
+                {"detail": f"At most {self.bulk_max_items} recipes allowed."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # bool is an int subclass, so only exact ints are recipe ids
+        ids = [
+            item.get("id") for item in items
+            if isinstance(item, dict) and type(item.get("id")) is int
+        ]
+        existing = Recipe.objects.filter(
+            user=request.user, id__in=ids
+        ).in_bulk()
+
+        # Validate against the ids of every item resolved up front
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+        context["related_objects"] = resolve_related_objects(
+            serializer_class(context=context), items
+        )
+        errors, valid, seen = [], [], set()
+        for item in items:
+            serializer = serializer_class(data=item, context=context)
+            item_errors = {} if serializer.is_valid() else serializer.errors
+            recipe_id = item.get("id") if isinstance(item, dict) else None
+            if recipe_id is not None:
+                if (type(recipe_id) is not int or recipe_id not in existing
+                        or recipe_id in seen):
+                    item_errors = dict(item_errors, id=["Invalid recipe id."])
+                else:
+                    seen.add(recipe_id)
+            errors.append(item_errors)
+            valid.append((recipe_id, serializer.validated_data))
+
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        recipes = bulk_write_recipes(request.user, valid, existing)
+        written = Recipe.objects.filter(
+            id__in=[recipe.id for recipe in recipes]
+        ).prefetch_related("tags", "ingredients").in_bulk()
+        serializer = self.get_serializer(
+            [written[recipe.id] for recipe in recipes],
+            many=True
+        )
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(methods=["GET"], detail=False, url_path="export")
+    def export(self, request):
+        """Stream all of the user's recipes as NDJSON, CSV or a JSON array
+
+        The body is gzipped on the fly when the client accepts it.
+        """
+        export_format = request.query_params.get("type", "ndjson")
+        if export_format == "json":
+            response = StreamingJSONResponse(recipe_items(request.user))
+        elif export_format in EXPORT_FORMATS:
+            response = StreamingHttpResponse(
+                export_recipes(request.user, export_format),
+                content_type=EXPORT_FORMATS[export_format][1]
+            )
+        else:
+            raise ValidationError({"type": (
+                f"Expected one of: {', '.join(EXPORT_FORMATS)}, json"
+            )})
+
+        response["Content-Disposition"] = (
+            f'attachment; filename="recipes.{export_format}"'
+        )
+        if GZIP_ACCEPTED.search(request.META.get("HTTP_ACCEPT_ENCODING", "")):
+            response.streaming_content = compress_sequence(
+                response.streaming_content
+            )
+            response["Content-Encoding"] = "gzip"
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        return response
+
+
+class RecipeStatsView(generics.RetrieveAPIView):
+    """Return the running recipe stats of the authenticated user
+
+    Stats are kept up to date as recipes change, so this reads one row
+    and the counted tags and ingredients instead of aggregating recipes.
+    """
+    serializer_class = serializers.RecipeStatsSerializer
+    authentication_classes = (
+        CachedTokenAuthentication,
+        SignedAccessTokenAuthentication,
+    )
+    permission_classes = (IsAuthenticated,)
+
+    def get_object(self):
+        user = self.request.user
+        return (
+            RecipeStats.objects.filter(user=user).first()
+            or RecipeStats(user=user)
+        )
@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BaseAuthentication,
+    TokenAuthentication,
+    get_authorization_header
+)
+from rest_framework.permissions import SAFE_METHODS
+
+
+ACCESS_TOKEN_SALT = "user.access-token"
+
+
+class TokenCache:
+    """Bounded LRU of token keys to (user, token) with a TTL"""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached (user, token) for a key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Cache a (user, token) pair, evicting the least recently used"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, key):
+        """Remove a token key from the cache"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def evict_user(self, user_id):
+        """Remove every cached token of a user"""
+        with self._lock:
+            keys = [
+                key for key, (expires, (user, token)) in self._entries.items()
+                if user.pk == user_id
+            ]
+            for key in keys:
+                del self._entries[key]
+
+    def clear(self):
+        """Remove every cached token"""
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(
+    max_size=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl=settings.AUTH_TOKEN_CACHE_TTL
+)
+
+
+def copy_instance(instance):
+    """Return a fresh copy of a model instance built without a query"""
+    names = [field.attname for field in instance._meta.concrete_fields]
+    return type(instance).from_db(
+        instance._state.db,
+        names,
+        [getattr(instance, name) for name in names]
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches the token to user resolution
+
+    The cached instances are shared by every thread, so each request
+    gets copies of them; a view changing request.user never exposes
+    partial changes to other requests with the same token.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            token_cache.set(key, cached)
+
+        user, token = (copy_instance(instance) for instance in cached)
+        token.user = user
+        return user, token
+
+
+def make_access_token(user):
+    """Return a signed access token carrying the user id and expiry"""
+    payload = {
+        "uid": user.pk,
+        "exp": int(time.time()) + settings.ACCESS_TOKEN_TTL,
+    }
+
+    return signing.dumps(payload, salt=ACCESS_TOKEN_SALT)
+
+
+class SignedAccessTokenAuthentication(BaseAuthentication):
+    """Verify signed access tokens without a database round trip
+
+    Clients send "Authorization: Bearer <access token>". The user is
+    built with every field but the id deferred, so it is only read from
+    the database when a view accesses its other fields.
+
+    A token stays valid for reads until it expires, even once its user
+    is deactivated or deleted. Writes check that the user still exists
+    and is active, so they are never attributed to a removed account.
+    """
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if not settings.SIGNED_ACCESS_TOKENS:
+            return None
+
+        if len(auth) != 2:
+            msg = _("Invalid access token header.")
+            raise exceptions.AuthenticationFailed(msg)
+
+        try:
+            payload = signing.loads(
+                auth[1].decode(),
+                salt=ACCESS_TOKEN_SALT
+            )
+        except (signing.BadSignature, UnicodeError):
+            raise exceptions.AuthenticationFailed(_("Invalid access token."))
+
+        if payload["exp"] < time.time():
+            raise exceptions.AuthenticationFailed(_("Access token expired."))
+
+        if request.method not in SAFE_METHODS and \
+                not get_user_model().objects.filter(
+                    pk=payload["uid"], is_active=True
+                ).exists():
+            msg = _("User inactive or deleted.")
+            raise exceptions.AuthenticationFailed(msg)
+
+        user = get_user_model().from_db(None, ["id"], [payload["uid"]])
+        return user, payload
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model, authenticate
 from rest_framework import serializers
+from rest_framework.authtoken.models import Token
 from django.utils.translation import ugettext_lazy as _
 
 
@@ -58,3 +59,25 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs["user"] = user
         return attrs
+
+
+class AccessTokenRefreshSerializer(serializers.Serializer):
+    """Serializer for exchanging a DB token for an access token"""
+
+    token = serializers.CharField(trim_whitespace=False)
+
+    def validate(self, attrs):
+        """Validate the DB token and return its user"""
+        try:
+            token = Token.objects.select_related("user").get(
+                key=attrs["token"]
+            )
+        except Token.DoesNotExist:
+            token = None
+
+        if token is None or not token.user.is_active:
+            msg = _("Unable to authenticate the given token")
+            raise serializers.ValidationError(msg, code="authentication")
+
+        attrs["user"] = token.user
+        return attrs
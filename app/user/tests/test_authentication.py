@@ -0,0 +1,192 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import (
+    CachedTokenAuthentication,
+    token_cache,
+    make_access_token
+)
+
+
+ME_URL = reverse("user:me")
+TOKEN_URL = reverse("user:token")
+REFRESH_URL = reverse("user:token-refresh")
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating with cached tokens"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "test@outlook.com",
+            "test123"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_token_lookup_is_cached(self):
+        """Test the token is only looked up on the first request"""
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["email"], self.user.email)
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token is no longer accepted"""
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test a deactivated user can no longer authenticate"""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_user_not_shared_between_requests(self):
+        """Test each request gets its own copy of the cached user"""
+        authentication = CachedTokenAuthentication()
+        user_1, token_1 = authentication.authenticate_credentials(
+            self.token.key
+        )
+        user_1.name = "Changed in one request"
+
+        with self.assertNumQueries(0):
+            user_2, token_2 = authentication.authenticate_credentials(
+                self.token.key
+            )
+
+        self.assertIsNot(user_1, user_2)
+        self.assertEqual(user_2.pk, self.user.pk)
+        self.assertEqual(user_2.name, self.user.name)
+        self.assertIs(token_2.user, user_2)
+
+    def test_cache_is_bounded(self):
+        """Test the least recently used token is evicted when full"""
+        max_size = token_cache.max_size
+        token_cache.max_size = 1
+        try:
+            token_cache.set("first", (self.user, None))
+            token_cache.set("second", (self.user, None))
+        finally:
+            token_cache.max_size = max_size
+
+        self.assertIsNone(token_cache.get("first"))
+        self.assertIsNotNone(token_cache.get("second"))
+
+
+@override_settings(SIGNED_ACCESS_TOKENS=True)
+class SignedAccessTokenTests(TestCase):
+    """Test issuing and authenticating with signed access tokens"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@outlook.com",
+            "test123"
+        )
+        self.client = APIClient()
+
+    def test_create_token_includes_access_token(self):
+        """Test the token endpoint also issues an access token"""
+        res = self.client.post(
+            TOKEN_URL,
+            {"email": "test@outlook.com", "password": "test123"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("token", res.data)
+        self.assertIn("access", res.data)
+
+    def test_access_token_authenticates_without_query(self):
+        """Test a valid access token is verified without the database"""
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {make_access_token(self.user)}"
+        )
+
+        # Only the recipe list itself is queried
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_access_token_of_deleted_user_cannot_write(self):
+        """Test writes check the user of an access token still exists"""
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {make_access_token(self.user)}"
+        )
+        self.user.delete()
+
+        res_read = self.client.get(RECIPES_URL)
+        res_write = self.client.post(TAGS_URL, {"name": "Vegan"})
+
+        self.assertEqual(res_read.status_code, status.HTTP_200_OK)
+        self.assertEqual(res_read.data["results"], [])
+        self.assertEqual(res_write.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_expired_access_token_rejected(self):
+        """Test an expired access token is rejected"""
+        with override_settings(ACCESS_TOKEN_TTL=-1):
+            access = make_access_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_tampered_access_token_rejected(self):
+        """Test an access token with a bad signature is rejected"""
+        access = make_access_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}x")
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_access_token(self):
+        """Test a DB token can be exchanged for an access token"""
+        token = Token.objects.create(user=self.user)
+
+        res = self.client.post(REFRESH_URL, {"token": token.key})
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {res.data['access']}"
+        )
+        res_me = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res_me.data["email"], self.user.email)
+
+    def test_refresh_invalid_token(self):
+        """Test refreshing with an unknown DB token fails"""
+        res = self.client.post(REFRESH_URL, {"token": "invalid"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(SIGNED_ACCESS_TOKENS=False)
+    def test_access_tokens_disabled(self):
+        """Test access tokens are ignored unless enabled"""
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {make_access_token(self.user)}"
+        )
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
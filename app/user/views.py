@@ -1,7 +1,28 @@
-from rest_framework import generics, authentication, permissions
-from user.serializers import UserSerializer, AuthTokenSerializer
+from django.conf import settings
+from rest_framework import generics, permissions, status
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+from user.authentication import (
+    CachedTokenAuthentication,
+    SignedAccessTokenAuthentication,
+    make_access_token
+)
+from user.serializers import (
+    UserSerializer,
+    AuthTokenSerializer,
+    AccessTokenRefreshSerializer
+)
+
+
+def access_token_data(user):
+    """Return the access token fields of a token response"""
+    return {
+        "access": make_access_token(user),
+        "expires_in": settings.ACCESS_TOKEN_TTL,
+    }
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -14,11 +35,47 @@ class CreateTokenView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
+    def post(self, request, *args, **kwargs):
+        """Return a DB token, plus an access token when enabled"""
+        serializer = self.serializer_class(
+            data=request.data,
+            context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data["user"]
+        token, created = Token.objects.get_or_create(user=user)
+
+        data = {"token": token.key}
+        if settings.SIGNED_ACCESS_TOKENS:
+            data.update(access_token_data(user))
+
+        return Response(data)
+
+
+class RefreshAccessTokenView(APIView):
+    """Issue a new signed access token for a DB token"""
+    serializer_class = AccessTokenRefreshSerializer
+    authentication_classes = ()
+    permission_classes = ()
+
+    def post(self, request, *args, **kwargs):
+        """Validate the DB token and return a fresh access token"""
+        if not settings.SIGNED_ACCESS_TOKENS:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(access_token_data(serializer.validated_data["user"]))
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user"""
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (
+        CachedTokenAuthentication,
+        SignedAccessTokenAuthentication,
+    )
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):